@@ -0,0 +1,58 @@
+"""
+Академиялық күнтізбе - семестр, аттестация және сессия кезеңдерінің даталары
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+# 2025-2026 оқу жылы (calculate_academic_week көрсететін күнтізбе)
+ACADEMIC_YEAR_START = date(2025, 9, 1)
+ACADEMIC_YEAR_END = date(2026, 8, 31)
+
+FALL_START = date(2025, 9, 1)
+FALL_END = date(2025, 12, 13)
+SPRING_START = date(2026, 1, 26)
+SPRING_END = date(2026, 4, 4)
+
+ATTESTATION = "attestation"
+TERM = "term"
+PRACTICE = "practice"
+HOLIDAYS = "holidays"
+
+# Бағалар қойылатын кезеңдер: аттестация апталары және емтихан сессиясы
+GRADING_WINDOWS = (
+    (date(2025, 10, 20), date(2025, 10, 25)),
+    (date(2025, 12, 8), date(2025, 12, 31)),
+    (date(2026, 2, 23), date(2026, 2, 28)),
+    (date(2026, 3, 30), date(2026, 4, 11)),
+)
+# Оқытушылар бағаны кезең біткеннен кейін де біраз уақыт енгізеді
+GRADING_GRACE_DAYS = 3
+
+# Практика және диплом қорғау — бағалар сирек
+PRACTICE_WINDOWS = (
+    (date(2026, 4, 13), date(2026, 5, 16)),
+    (date(2026, 5, 20), date(2026, 7, 4)),
+)
+
+
+def _within(day: date, windows, grace: int = 0) -> bool:
+    return any(start <= day <= end + timedelta(days=grace) for start, end in windows)
+
+
+def academic_period(day: Optional[date] = None) -> str:
+    """
+    Күннің кезеңі: ATTESTATION, TERM, PRACTICE немесе HOLIDAYS.
+    Күнтізбеде жоқ оқу жылы үшін TERM қайтарылады — күнтізбе жаңартылмаса
+    бағалар әдеттегі жиілікпен тексеріле береді.
+    """
+    day = day or date.today()
+    if not ACADEMIC_YEAR_START <= day <= ACADEMIC_YEAR_END:
+        return TERM
+    if _within(day, GRADING_WINDOWS, GRADING_GRACE_DAYS):
+        return ATTESTATION
+    if FALL_START <= day <= FALL_END or SPRING_START <= day <= SPRING_END:
+        return TERM
+    if _within(day, PRACTICE_WINDOWS):
+        return PRACTICE
+    return HOLIDAYS
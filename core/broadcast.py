@@ -0,0 +1,157 @@
+"""
+Жаппай хабарлама тарату - шектеулі параллельдік, push сервисі бойынша лимит және фондық job
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+# Бір уақытта жіберілетін push саны (барлық сервистер бойынша)
+BROADCAST_CONCURRENCY = int(os.environ.get("BROADCAST_CONCURRENCY", 100))
+# Бір push сервисіне (fcm.googleapis.com, updates.push.services.mozilla.com, ...) параллель сұраныс
+BROADCAST_PER_HOST = int(os.environ.get("BROADCAST_PER_HOST", 20))
+# Жадта сақталатын соңғы job-тар саны
+BROADCAST_JOBS_KEPT = 20
+
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+
+# Бір пайдаланушыға жіберудің нәтижесі
+SENT = "sent"
+# Тыныш сағаттарда кейінге қалдырылды — терезе біткенде жіберіледі
+DEFERRED = "deferred"
+FAILED = "failed"
+
+
+class BroadcastJob:
+    """Бір таратудың күйі мен нәтижелері"""
+
+    def __init__(self, total: int):
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.sent = 0
+        self.deferred = 0
+        self.failed = 0
+        self.status = RUNNING
+        self.results: Dict[str, str] = {}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: str, result: str):
+        self.results[user_id] = result
+        if result == SENT:
+            self.sent += 1
+        elif result == DEFERRED:
+            self.deferred += 1
+        else:
+            self.failed += 1
+
+    async def wait(self) -> Dict[str, str]:
+        if self.task is not None:
+            await asyncio.shield(self.task)
+        return self.results
+
+    def progress(self) -> Dict[str, Any]:
+        done = self.sent + self.deferred + self.failed
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "done": done,
+            "sent": self.sent,
+            "deferred": self.deferred,
+            "failed": self.failed,
+            "percent": round(done / self.total * 100, 1) if self.total else 100.0,
+            "elapsed_s": round(end - self.started_at, 2),
+        }
+
+
+class BroadcastEngine:
+    """
+    Пайдаланушылар push сервисінің host-ы бойынша топталады; әр host-қа
+    per_host worker. Жалпы және host бойынша семафорлар engine-ге ортақ,
+    сондықтан қатар жүрген бірнеше job те лимиттен аспайды.
+    Баяу сервис басқа сервистердің кезегін тоқтатпайды.
+    """
+
+    def __init__(self, concurrency: int = BROADCAST_CONCURRENCY, per_host: int = BROADCAST_PER_HOST):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.jobs: "OrderedDict[str, BroadcastJob]" = OrderedDict()
+        self._limit = asyncio.Semaphore(concurrency)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return limit
+
+    def start(
+        self,
+        targets: Iterable[Tuple[str, str]],
+        send: Callable[[str], Awaitable[str]],
+    ) -> BroadcastJob:
+        """targets — (user_id, endpoint) жұптары; send — SENT/DEFERRED/FAILED; job фонда орындалады"""
+        by_host: Dict[str, list] = {}
+        for user_id, endpoint in targets:
+            by_host.setdefault(urlparse(endpoint or "").netloc, []).append(user_id)
+
+        job = BroadcastJob(sum(len(users) for users in by_host.values()))
+        job.task = asyncio.create_task(self._run(job, by_host, send))
+        self.jobs[job.id] = job
+        while len(self.jobs) > BROADCAST_JOBS_KEPT:
+            self.jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[BroadcastJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.task is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+    async def _run(self, job: BroadcastJob, by_host: Dict[str, list], send):
+        async def worker(host: str, queue: list):
+            while queue:
+                user_id = queue.pop()
+                async with self._host_limit(host), self._limit:
+                    try:
+                        result = await send(user_id)
+                    except Exception as e:
+                        print(f"Broadcast error for {user_id}: {e}")
+                        result = FAILED
+                job.record(user_id, result)
+
+        workers = [
+            worker(host, users)
+            for host, users in by_host.items()
+            for _ in range(min(self.per_host, len(users)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+            job.status = DONE
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            raise
+        finally:
+            job.finished_at = time.time()
+            progress = job.progress()
+            print(
+                f"Broadcast {job.id} {job.status}: {progress['sent']}/{progress['total']} sent, "
+                f"{progress['deferred']} deferred, {progress['failed']} failed "
+                f"in {progress['elapsed_s']}s"
+            )
+
+
+broadcast_engine = BroadcastEngine()
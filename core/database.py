@@ -0,0 +1,32 @@
+"""
+Деректер базасы - деректер каталогы және ортақ SQLite байланысы (алғаш керек болғанда ашылады)
+"""
+
+import os
+import sqlite3
+from typing import Optional
+
+from utils.sqlite_storage import open_database
+
+# Деректер файлдары жұмыс каталогына емес, жоба түбіріне (немесе DATA_DIR-ге) қатысты
+DATA_DIR = os.environ.get(
+    "DATA_DIR", os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+# Жазылулар (және басқа кестелер) сақталатын SQLite базасы
+DATABASE_FILE = "univer.db"
+
+_database: Optional[sqlite3.Connection] = None
+
+
+def data_path(name: str) -> str:
+    """Деректер каталогындағы файлдың толық жолы"""
+    return os.path.join(DATA_DIR, name)
+
+
+def get_database() -> sqlite3.Connection:
+    """Ортақ байланыс — import кезінде емес, бірінші шақыруда ашылады"""
+    global _database
+    if _database is None:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        _database = open_database(data_path(DATABASE_FILE))
+    return _database
@@ -1,8 +1,17 @@
 import asyncio
 import base64
+import functools
+import hashlib
 import json
+import time
 import aiohttp
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from utils.cache import SingleFlight, TTLCache
+from utils.http_client import HttpClient
+from functions.portal_health import portal_health
 
 # Университеттер тізімі — Platonus порталдары бар барлық КЗ жоғары оқу орындары
 # Формат: код → {url, name, logo, website}
@@ -179,6 +188,15 @@ def _univer_url(code: str, default: str = "https://platonus.kstu.kz") -> str:
         return entry["url"]
     return default
 
+
+def _univer_code_for_url(url: str) -> Optional[str]:
+    """Platonus URL-інен университет кодын табу (денсаулық статистикасы үшін)."""
+    for code, info in UNIVERSITIES.items():
+        base = info["url"]
+        if url == base or url.startswith(base + "/"):
+            return code
+    return None
+
 PLATONUS_TIMEOUT = aiohttp.ClientTimeout(total=15)
 PLATONUS_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -188,6 +206,74 @@ PLATONUS_HEADERS = {
 
 _AUTH_FAIL_STATUSES = (401, 403)
 
+# Барлық Platonus сұраныстары өтетін ортақ HTTP клиент (keep-alive pool).
+# server.on_startup ашады, server.on_cleanup жабады.
+platonus_client = HttpClient(PLATONUS_TIMEOUT, limit=300, limit_per_host=30)
+
+
+class PortalUnavailable(Exception):
+    """Порталдың circuit-і ашық — сұраныс жіберілмейді."""
+
+
+@asynccontextmanager
+async def platonus_request(
+    method: str,
+    url: str,
+    headers: dict,
+    cookies: Optional[dict] = None,
+    **kwargs,
+):
+    """
+    Ортақ сессия арқылы Platonus-қа сұраныс (cookies/headers әр сұранысқа бөлек).
+
+    Latency мен қателер portal_health-ке жазылады; circuit ашық болса
+    PortalUnavailable бірден көтеріледі. Әр сұраныс бір рет саналады —
+    тек жіберу мен headers-ті оқу кезіндегі қателер; шақырушы денені
+    оқығанда болған қате (мысалы HTML бетке resp.json()) порталға жазылмайды.
+
+    Өз pool-ымыздағы кезек (limit_per_host) timeout-қа да, порталдың
+    қателеріне де кірмейді: орын бөлек күтіледі, тек содан кейін жіберіледі.
+    """
+    code = _univer_code_for_url(url)
+    if not portal_health.is_available(code):
+        raise PortalUnavailable(code)
+
+    session = await platonus_client.session()
+    slot = platonus_client.host_slot(urlparse(url).netloc)
+    # Кезек ұзарса — бұл біздің жүктеме, портал қатесі ретінде жазылмайды
+    await asyncio.wait_for(slot.acquire(), PLATONUS_TIMEOUT.total)
+    try:
+        started = time.monotonic()
+        try:
+            resp = await session.request(method, url, headers=headers, cookies=cookies, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            portal_health.record_failure(code, str(e) or type(e).__name__)
+            raise
+
+        if resp.status >= 500:
+            portal_health.record_failure(code, f"HTTP {resp.status}")
+        else:
+            portal_health.record_success(code, time.monotonic() - started)
+        try:
+            yield resp
+        finally:
+            resp.release()
+    finally:
+        slot.release()
+
+
+# Фондық probe үшін қысқа timeout
+PROBE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+
+async def probe_platonus_portal(code: str) -> bool:
+    """Ашық circuit-ті тексеру: портал басты беті 5xx-сыз жауап берсе — тірі."""
+    session = await platonus_client.session()
+    url = _univer_url(code)
+    async with platonus_client.host_slot(urlparse(url).netloc):
+        async with session.get(url, timeout=PROBE_TIMEOUT) as resp:
+            return resp.status < 500
+
 
 def _encode_pt(auth_token: str, sid: str, cookies: dict, platonus_url: str) -> str:
     data = {"t": auth_token, "s": sid, "c": cookies, "url": platonus_url}
@@ -218,13 +304,54 @@ def _pt_headers_and_cookies(pt_cookie: str):
     cookies["plt_sid"] = data.get("s", "")
     return headers, cookies
 
+
+# personID кэші — journal/subject сұраныстары алдындағы қосымша round trip-ті болдырмау.
+# Кілттер: Platonus сессиясы (token+sid) және username+университет.
+# username кілті тек осы сервер логин жасаған сессиялардан толтырылады —
+# cookie ішіндегі деректерге сенбейміз.
+PERSON_ID_SESSION_TTL = 6 * 3600
+PERSON_ID_USER_TTL = 7 * 24 * 3600
+_person_id_cache = TTLCache(maxsize=20000, ttl=PERSON_ID_SESSION_TTL)
+_login_sessions = TTLCache(maxsize=20000, ttl=PERSON_ID_SESSION_TTL)
+
+
+def _session_key(pt_cookie: str) -> tuple:
+    data = _decode_pt(pt_cookie)
+    return ("session", data.get("url") or "", data.get("t", ""), data.get("s", ""))
+
+
+def _user_key(username: str, platonus_url: str) -> tuple:
+    return ("user", platonus_url, username)
+
+
+# Бір сессиядан бір уақытта келген бірдей сұраныстар (бірнеше таб, PWA ашылуы)
+# upstream-ге бір рет қана барады
+_inflight = SingleFlight()
+
+
+def _coalesced(fn):
+    """(сессия, endpoint, параметрлер) бойынша қатар шақыруларды біріктіру"""
+
+    @functools.wraps(fn)
+    async def wrapper(pt_cookie: str, *args, **kwargs):
+        key = (fn.__name__, _session_key(pt_cookie), args, tuple(sorted(kwargs.items())))
+        return await _inflight.do(key, lambda: fn(pt_cookie, *args, **kwargs))
+
+    return wrapper
+
+
+def invalidate_person_id(pt_cookie: str):
+    """401/403 кезінде сессияның personID кэшін тазалау."""
+    session_key = _session_key(pt_cookie)
+    _person_id_cache.pop(session_key)
+    _login_sessions.pop(session_key)
+
 def _is_iin(value: str) -> bool:
     """ИИН форматын тексеру: дәл 12 сан."""
     return value.isdigit() and len(value) == 12
 
 
 async def _try_platonus_login_payload(
-    session: aiohttp.ClientSession,
     login_url: str,
     payload: dict,
     headers: dict,
@@ -232,7 +359,7 @@ async def _try_platonus_login_payload(
 ) -> Optional[str]:
     """Берілген payload арқылы логин жасап, сәтті болса pt_token қайтарады."""
     try:
-        async with session.post(login_url, json=payload, headers=headers) as resp:
+        async with platonus_request("POST", login_url, headers, json=payload) as resp:
             if resp.status != 200:
                 return None
             data = await resp.json()
@@ -259,7 +386,12 @@ async def platonus_login(username: str, password: str, univer_code: str = "kstu"
     - IIN режимі:   'iin' өрісіне ИИН жіберіледі (ЖСН/пароль)
     
     username 12 цифрдан тұрса → екі режимді де параллель тексереді.
+    Порталдың circuit-і ашық болса PortalUnavailable көтеріледі — бұл
+    қате пароль емес.
     """
+    if not portal_health.is_available(univer_code):
+        raise PortalUnavailable(univer_code)
+
     platonus_url = _univer_url(univer_code)
     login_url = f"{platonus_url}/rest/api/login"
     headers = {**PLATONUS_HEADERS, "language": "2"}  # 2=Russian, 1=Kazakh
@@ -277,51 +409,215 @@ async def platonus_login(username: str, password: str, univer_code: str = "kstu"
     iin_payload = {**base, "login": None, "iin": username} if _is_iin(username) else None
 
     try:
-        async with aiohttp.ClientSession(timeout=PLATONUS_TIMEOUT) as session:
-            if iin_payload is not None:
-                # Екі режимді параллель тексер — бірінші сәттісі жеңеді
-                results = await asyncio.gather(
-                    _try_platonus_login_payload(session, login_url, login_payload, headers, platonus_url),
-                    _try_platonus_login_payload(session, login_url, iin_payload, headers, platonus_url),
-                    return_exceptions=True,
-                )
-                for r in results:
-                    if r and not isinstance(r, Exception):
-                        return r
-                return None
-            else:
-                return await _try_platonus_login_payload(
-                    session, login_url, login_payload, headers, platonus_url
-                )
+        if iin_payload is not None:
+            # Екі режимді параллель тексер — бірінші сәттісі жеңеді
+            results = await asyncio.gather(
+                _try_platonus_login_payload(login_url, login_payload, headers, platonus_url),
+                _try_platonus_login_payload(login_url, iin_payload, headers, platonus_url),
+                return_exceptions=True,
+            )
+            pt_token = None
+            for r in results:
+                if r and not isinstance(r, Exception):
+                    pt_token = r
+                    break
+        else:
+            pt_token = await _try_platonus_login_payload(
+                login_url, login_payload, headers, platonus_url
+            )
     except Exception:
         return None
 
+    if pt_token:
+        # Жаңа сессияны пайдаланушымен байланыстырамыз; personID бұрыннан
+        # белгілі болса — бірден кэшке саламыз
+        session_key = _session_key(pt_token)
+        user_key = _user_key(username, platonus_url)
+        _login_sessions.set(session_key, user_key)
+        person_id = _person_id_cache.get(user_key)
+        if person_id:
+            _person_id_cache.set(session_key, person_id)
+    return pt_token
+
+
+# Қайта логиннен алынған токендер сервер жағында сақталады: браузер жаңа
+# cookie-ді сақтағанға дейін келген сұраныстар да қайта логин жасамайды.
+REFRESHED_TOKEN_TTL = 30 * 60
+_refreshed_tokens = TTLCache(maxsize=20000, ttl=REFRESHED_TOKEN_TTL)
+# ескірген сессия → (credentials кілті, оны алмастырған pt_token)
+_replaced_tokens = TTLCache(maxsize=20000, ttl=REFRESHED_TOKEN_TTL)
+_refresh_inflight = SingleFlight()
+
+
+def _credentials_key(username: str, password: str, univer_code: str) -> tuple:
+    password_hash = hashlib.sha256(password.encode()).hexdigest()
+    return (univer_code, username, password_hash)
+
+
+async def platonus_refresh_login(
+    username: str,
+    password: str,
+    univer_code: str = "kstu",
+    stale_pt: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Токенді жаңарту үшін қайта логин.
+
+    Бір (username, университет) үшін бір уақытта тек бір логин жасалады —
+    қатар келген сұраныстар сол нәтижені күтеді. Жақында алынған токен
+    кэштен қайтарылады (егер ол stale_pt-ның өзі болмаса).
+    """
+    key = _credentials_key(username, password, univer_code)
+    cached = _refreshed_tokens.get(key)
+    if cached and cached != stale_pt:
+        if stale_pt:
+            _replaced_tokens.set(_session_key(stale_pt), (key, cached))
+        return cached
+
+    async def _login() -> Optional[str]:
+        pt_token = await platonus_login(username, password, univer_code)
+        if pt_token:
+            _refreshed_tokens.set(key, pt_token)
+        return pt_token
+
+    pt_token = await _refresh_inflight.do(key, _login)
+    if pt_token and stale_pt:
+        _replaced_tokens.set(_session_key(stale_pt), (key, pt_token))
+    return pt_token
+
+
+def platonus_replacement_token(
+    pt_cookie: str, username: str, password: str, univer_code: str = "kstu"
+) -> Optional[str]:
+    """
+    Ескірген pt_token үшін сервер жаңартып қойған токенді қайтару (болса).
+    Тек сол токенді алған credentials-пен ғана беріледі.
+    """
+    entry = _replaced_tokens.get(_session_key(pt_cookie))
+    if entry and entry[0] == _credentials_key(username, password, univer_code):
+        return entry[1]
+    return None
+
+
+# Автоматты анықтау режимінің жалпы уақыт шегі (секунд)
+AUTO_LOGIN_DEADLINE = 10
+# Таныс порталдың басқалардан бұрын жалғыз тексерілетін уақыты (секунд)
+KNOWN_PORTAL_HEAD_START = 2
+
+
+async def platonus_login_auto(
+    username: str,
+    password: str,
+    codes: Optional[List[str]] = None,
+    deadline: float = AUTO_LOGIN_DEADLINE,
+    preferred: Optional[str] = None,
+    head_start: float = KNOWN_PORTAL_HEAD_START,
+) -> Optional[tuple[str, str]]:
+    """
+    Университетті автоматты анықтау: барлық порталға параллель логин жасап,
+    бірінші сәтті жауапты (univer_code, pt_token) ретінде қайтарады.
+
+    preferred берілсе, ол портал head_start секунд бұрын жалғыз басталады;
+    қалғандары одан кейін немесе ол сәтсіз аяқталса бірден қосылады. Бәрі
+    бір deadline ішінде — таныс портал логинді ұзартпайды.
+
+    Қалған порталдар бірден тоқтатылады; deadline ішінде ешкім
+    қабылдамаса — None.
+    """
+    codes = list(codes) if codes is not None else list(UNIVERSITIES.keys())
+    # Circuit-і ашық порталдарға уақыт жұмсамаймыз
+    codes = portal_health.available(codes)
+    if not codes:
+        return None
+
+    loop = asyncio.get_running_loop()
+    tasks: Dict[asyncio.Task, str] = {}
+
+    def start(batch: List[str]) -> Set[asyncio.Task]:
+        started = {
+            asyncio.create_task(platonus_login(username, password, code)): code
+            for code in batch
+        }
+        tasks.update(started)
+        return set(started)
+
+    end = loop.time() + deadline
+    if preferred in codes:
+        deferred = [code for code in codes if code != preferred]
+        pending = start([preferred])
+        launch_at = loop.time() + head_start
+    else:
+        deferred = []
+        pending = start(codes)
+    try:
+        while pending or deferred:
+            now = loop.time()
+            if deferred and (not pending or now >= launch_at):
+                pending |= start(deferred)
+                deferred = []
+            remaining = end - now
+            if remaining <= 0:
+                break
+            timeout = min(remaining, launch_at - now) if deferred else remaining
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                pt_token = task.result()
+                if pt_token:
+                    return tasks[task], pt_token
+        # Deadline-ға дейін жауап бермеген порталдар қате деп саналмайды:
+        # deadline PLATONUS_TIMEOUT-тан қысқа, баяу портал әлі тірі болуы мүмкін
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
 
 
+@_coalesced
 async def platonus_get_person_id(pt_cookie: str) -> Optional[int]:
+    session_key = _session_key(pt_cookie)
+    person_id = _person_id_cache.get(session_key)
+    if person_id is not None:
+        return person_id
+
     platonus_url = _pt_url(pt_cookie)
     headers, cookies = _pt_headers_and_cookies(pt_cookie)
     url = f"{platonus_url}/rest/api/person/personID"
     try:
-        async with aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status == 200:
-                    res = await resp.json()
-                    return res.get("personID")
+        async with platonus_request("GET", url, headers, cookies) as resp:
+            if resp.status in _AUTH_FAIL_STATUSES:
+                invalidate_person_id(pt_cookie)
+                return None
+            if resp.status == 200:
+                res = await resp.json()
+                person_id = res.get("personID")
+                if person_id:
+                    _person_id_cache.set(session_key, person_id)
+                    user_key = _login_sessions.get(session_key)
+                    if user_key:
+                        _person_id_cache.set(user_key, person_id, ttl=PERSON_ID_USER_TTL)
+                return person_id
+    except PortalUnavailable:
+        raise
     except Exception:
         pass
     return None
 
 
+@_coalesced
 async def platonus_get_student_info(pt_cookie: str) -> Optional[dict]:
     platonus_url = _pt_url(pt_cookie)
     headers, cookies = _pt_headers_and_cookies(pt_cookie)
     url = f"{platonus_url}/rest/api/person/personName"
     try:
-        async with aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status == 200:
-                    return await resp.json()
+        async with platonus_request("GET", url, headers, cookies) as resp:
+            if resp.status == 200:
+                return await resp.json()
     except Exception:
         pass
     return None
@@ -434,6 +730,7 @@ def transform_marks(marks: List[Dict], center_mark: str = None) -> List:
     ]
 
 
+@_coalesced
 async def platonus_get_attestation(
     pt_cookie: str, year: int, semester: int
 ) -> Optional[List]:
@@ -442,6 +739,7 @@ async def platonus_get_attestation(
        None   — auth token expired / personID unavailable → trigger refresh
        []     — authenticated but no subjects
        [...]  — list of subject dicts
+    Raises PortalUnavailable when the portal's circuit is open (not an expired session).
     """
     person_id = await platonus_get_person_id(pt_cookie)
     if not person_id:
@@ -452,34 +750,37 @@ async def platonus_get_attestation(
     url = f"{platonus_url}/journal/{year}/{semester}/{person_id}"
 
     try:
-        async with aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status in _AUTH_FAIL_STATUSES:
-                    return None
-                if resp.status != 200:
-                    print(f"Platonus journal failed: {resp.status}")
-                    return []
-
-                subjects = await resp.json()
-                result = []
-                for s in subjects:
-                    exams = s.get("exams", [])
-                    result.append(
-                        {
-                            "subject": s.get("subjectName", "").split("(")[0].strip(),
-                            "subject_id": s.get("subjectID"),
-                            "query_id": s.get("queryID"),
-                            "attestation": transform_marks(exams, s.get("centerMark")),
-                            "attendance": [],
-                            "sum": ["Барлығы", 0, False],
-                        }
-                    )
-                return result
+        async with platonus_request("GET", url, headers, cookies) as resp:
+            if resp.status in _AUTH_FAIL_STATUSES:
+                invalidate_person_id(pt_cookie)
+                return None
+            if resp.status != 200:
+                print(f"Platonus journal failed: {resp.status}")
+                return []
+
+            subjects = await resp.json()
+            result = []
+            for s in subjects:
+                exams = s.get("exams", [])
+                result.append(
+                    {
+                        "subject": s.get("subjectName", "").split("(")[0].strip(),
+                        "subject_id": s.get("subjectID"),
+                        "query_id": s.get("queryID"),
+                        "attestation": transform_marks(exams, s.get("centerMark")),
+                        "attendance": [],
+                        "sum": ["Барлығы", 0, False],
+                    }
+                )
+            return result
+    except PortalUnavailable:
+        raise
     except Exception as e:
         print(f"Platonus attestation error: {e}")
         return []
 
 
+@_coalesced
 async def platonus_get_subject_details(
     pt_cookie: str, year: int, semester: int, subject_id: int, query_id: int
 ) -> Optional[List]:
@@ -498,23 +799,26 @@ async def platonus_get_subject_details(
     url = f"{platonus_url}/subject/{year}/{semester}/{subject_id}/{person_id}?queryID={query_id}"
 
     try:
-        async with aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status in _AUTH_FAIL_STATUSES:
-                    return None
-                if resp.status != 200:
-                    print(f"Platonus subject details failed: {resp.status}")
-                    return []
-                return await resp.json()
+        async with platonus_request("GET", url, headers, cookies) as resp:
+            if resp.status in _AUTH_FAIL_STATUSES:
+                invalidate_person_id(pt_cookie)
+                return None
+            if resp.status != 200:
+                print(f"Platonus subject details failed: {resp.status}")
+                return []
+            return await resp.json()
+    except PortalUnavailable:
+        raise
     except Exception as e:
         print(f"Platonus subject details error: {e}")
         return []
 
 
-async def platonus_get_transcript(pt_cookie: str) -> Optional[dict]:
+@_coalesced
+async def platonus_get_transcript_raw(pt_cookie: str) -> Optional[bytes]:
     """
     POST /rest/transcript/load/ru/0
-    Returns the student transcript data containing profile, GPA, and grade history.
+    Returns the raw (~300 KB) transcript body, so callers can hash it before parsing.
     """
     platonus_url = _pt_url(pt_cookie)
     headers, cookies = _pt_headers_and_cookies(pt_cookie)
@@ -528,19 +832,35 @@ async def platonus_get_transcript(pt_cookie: str) -> Optional[dict]:
         "searchText": ""
     }
     try:
-        async with aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT) as session:
-            async with session.post(url, json=payload, headers=headers) as resp:
-                if resp.status in _AUTH_FAIL_STATUSES:
-                    return None
-                if resp.status != 200:
-                    print(f"Platonus load transcript failed: {resp.status}")
-                    return None
-                return await resp.json()
+        async with platonus_request("POST", url, headers, cookies, json=payload) as resp:
+            if resp.status in _AUTH_FAIL_STATUSES:
+                return None
+            if resp.status != 200:
+                print(f"Platonus load transcript failed: {resp.status}")
+                return None
+            return await resp.read()
+    except PortalUnavailable:
+        raise
     except Exception as e:
         print(f"Platonus get transcript error: {e}")
         return None
 
 
+async def platonus_get_transcript(pt_cookie: str) -> Optional[dict]:
+    """
+    Returns the student transcript data containing profile, GPA, and grade history.
+    """
+    body = await platonus_get_transcript_raw(pt_cookie)
+    if body is None:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        print(f"Platonus get transcript error: {e}")
+        return None
+
+
+@_coalesced
 async def platonus_get_umkd_list(pt_cookie: str, year: int, semester: int) -> Optional[dict]:
     """
     GET /rest/umkd/studentRecords/{year}/{semester}/ru
@@ -550,19 +870,21 @@ async def platonus_get_umkd_list(pt_cookie: str, year: int, semester: int) -> Op
     headers, cookies = _pt_headers_and_cookies(pt_cookie)
     url = f"{platonus_url}/rest/umkd/studentRecords/{year}/{semester}/ru"
     try:
-        async with aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status in _AUTH_FAIL_STATUSES:
-                    return None
-                if resp.status != 200:
-                    print(f"Platonus get studentRecords failed: {resp.status}")
-                    return None
-                return await resp.json()
+        async with platonus_request("GET", url, headers, cookies) as resp:
+            if resp.status in _AUTH_FAIL_STATUSES:
+                return None
+            if resp.status != 200:
+                print(f"Platonus get studentRecords failed: {resp.status}")
+                return None
+            return await resp.json()
+    except PortalUnavailable:
+        raise
     except Exception as e:
         print(f"Platonus get UMKD list error: {e}")
         return None
 
 
+@_coalesced
 async def platonus_get_umkd_files(pt_cookie: str, umkd_id: int) -> Optional[list]:
     """
     GET /rest/student/umkd/{umkd_id}/ru
@@ -572,14 +894,15 @@ async def platonus_get_umkd_files(pt_cookie: str, umkd_id: int) -> Optional[list
     headers, cookies = _pt_headers_and_cookies(pt_cookie)
     url = f"{platonus_url}/rest/student/umkd/{umkd_id}/ru"
     try:
-        async with aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status in _AUTH_FAIL_STATUSES:
-                    return None
-                if resp.status != 200:
-                    print(f"Platonus student UMKD requirements failed: {resp.status}")
-                    return None
-                return await resp.json()
+        async with platonus_request("GET", url, headers, cookies) as resp:
+            if resp.status in _AUTH_FAIL_STATUSES:
+                return None
+            if resp.status != 200:
+                print(f"Platonus student UMKD requirements failed: {resp.status}")
+                return None
+            return await resp.json()
+    except PortalUnavailable:
+        raise
     except Exception as e:
         print(f"Platonus get UMKD files error: {e}")
         return None
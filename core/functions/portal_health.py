@@ -0,0 +1,170 @@
+"""
+Platonus порталдарының денсаулығы - latency/қате статистикасы және circuit breaker
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+# Қатарынан осынша қатеден кейін circuit ашылады
+FAILURE_THRESHOLD = 5
+# Ашық circuit-ті фондық тексеру аралығы (секунд)
+PROBE_INTERVAL = 60
+# EWMA тегістеу коэффициенті
+EWMA_ALPHA = 0.2
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class PortalStats:
+    """Бір порталдың статистикасы"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "open_for_s": round(time.monotonic() - self.opened_at) if self.opened_at else None,
+            "last_error": self.last_error,
+        }
+
+
+class PortalHealth:
+    """
+    Әр университет порталы үшін latency мен қателерді тіркейді.
+
+    FAILURE_THRESHOLD рет қатарынан қате болса circuit ашылады — портал
+    «өлі» деп саналып, сұраныстар 15 с timeout күтпей бірден тоқтатылады.
+    Фондық probe сәтті болса circuit қайта жабылады.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        probe_interval: float = PROBE_INTERVAL,
+    ):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.portals: Dict[str, PortalStats] = {}
+        self._probe: Optional[Callable[[str], Awaitable[bool]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _stats(self, code: str) -> PortalStats:
+        stats = self.portals.get(code)
+        if stats is None:
+            stats = self.portals[code] = PortalStats()
+        return stats
+
+    def is_available(self, code: Optional[str]) -> bool:
+        """
+        Circuit жабық болса True (белгісіз портал әрқашан қолжетімді).
+        HALF_OPEN кезінде жалғыз сынақ сұранысы — фондық probe; пайдаланушы
+        сұраныстары ол сәтті болғанша жаңа ғана тірілген порталға жіберілмейді.
+        """
+        if not code:
+            return True
+        stats = self.portals.get(code)
+        return stats is None or stats.state == CLOSED
+
+    def available(self, codes: Iterable[str]) -> list:
+        return [code for code in codes if self.is_available(code)]
+
+    def record_success(self, code: Optional[str], latency: float):
+        if not code:
+            return
+        stats = self._stats(code)
+        stats.requests += 1
+        stats.consecutive_failures = 0
+        latency_ms = latency * 1000
+        stats.latency_ms = (
+            latency_ms
+            if stats.latency_ms is None
+            else EWMA_ALPHA * latency_ms + (1 - EWMA_ALPHA) * stats.latency_ms
+        )
+        stats.error_rate = (1 - EWMA_ALPHA) * stats.error_rate
+        if stats.state != CLOSED:
+            print(f"Portal {code} recovered, closing circuit")
+            stats.state = CLOSED
+            stats.opened_at = None
+
+    def record_failure(self, code: Optional[str], error: str = ""):
+        if not code:
+            return
+        stats = self._stats(code)
+        stats.requests += 1
+        stats.errors += 1
+        stats.consecutive_failures += 1
+        stats.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * stats.error_rate
+        stats.last_error = error or None
+        if stats.state == HALF_OPEN or (
+            stats.state == CLOSED and stats.consecutive_failures >= self.failure_threshold
+        ):
+            if stats.state == CLOSED:
+                print(f"Portal {code} is failing ({error}), opening circuit")
+            stats.state = OPEN
+            stats.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {code: stats.to_dict() for code, stats in self.portals.items()}
+
+    def degraded(self) -> list:
+        return [code for code, stats in self.portals.items() if stats.state != CLOSED]
+
+    def start(self, probe: Callable[[str], Awaitable[bool]]):
+        """Ашық circuit-терді фондық тексеруді бастау"""
+        self._probe = probe
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            open_codes = [c for c, s in self.portals.items() if s.state == OPEN]
+            if open_codes and self._probe:
+                await asyncio.gather(
+                    *(self._probe_one(code) for code in open_codes),
+                    return_exceptions=True,
+                )
+
+    async def _probe_one(self, code: str):
+        stats = self._stats(code)
+        stats.state = HALF_OPEN
+        started = time.monotonic()
+        try:
+            ok = await self._probe(code)
+        except Exception as e:
+            ok = False
+            error = str(e) or type(e).__name__
+        else:
+            error = "probe failed"
+        if ok:
+            self.record_success(code, time.monotonic() - started)
+        else:
+            self.record_failure(code, error)
+
+
+portal_health = PortalHealth()
@@ -0,0 +1,203 @@
+"""
+Бағаларды тексеру жоспарлаушысы - келесі тексеру уақыттарының кезегі, бейімделетін интервал, параллельдік лимиттері
+"""
+
+import asyncio
+import hashlib
+import heapq
+import os
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from academic_calendar import ATTESTATION, HOLIDAYS, PRACTICE, TERM, academic_period
+
+# Семестр кезіндегі негізгі интервал (секунд)
+GRADE_CHECK_INTERVAL = int(os.environ.get("GRADE_CHECK_INTERVAL", 1800))
+# Бір уақытта тексерілетін пайдаланушылар саны
+GRADE_CHECK_CONCURRENCY = int(os.environ.get("GRADE_CHECK_CONCURRENCY", 20))
+# Бір университет порталына параллель тексерулер
+GRADE_CHECK_PER_UNIVER = int(os.environ.get("GRADE_CHECK_PER_UNIVER", 5))
+
+# Академиялық кезең бойынша интервал: аттестация мен сессияда жиі, демалыста сирек
+PERIOD_INTERVALS = {
+    ATTESTATION: 600,
+    TERM: GRADE_CHECK_INTERVAL,
+    PRACTICE: 3 * 3600,
+    HOLIDAYS: 6 * 3600,
+}
+# Түнде оқытушылар баға қоймайды — интервал осынша есе ұзарады
+NIGHT_HOURS = range(0, 7)
+NIGHT_FACTOR = 4
+# Бағасы жақында өзгерген пайдаланушы жиірек тексеріледі
+RECENT_CHANGE_WINDOW = 3 * 24 * 3600
+RECENT_CHANGE_FACTOR = 0.5
+MIN_INTERVAL = 300
+# Интервалға қосылатын кездейсоқ ауытқу (±10%) — тексерулер бір уақытқа жиналмайды
+INTERVAL_JITTER = 0.1
+# Пайдаланушылар тізімін қайта оқу жиілігі (секунд)
+TARGETS_REFRESH = 60
+
+
+class GradePollScheduler:
+    """
+    Әр пайдаланушының келесі тексеру уақыты heap кезегінде тұрады; уақыты
+    келгендер тексеріліп, жаңа интервалмен кезекке қайта қойылады.
+
+    Интервал академиялық кезеңнен (academic_period), тәулік уақытынан және
+    пайдаланушының бағасы соңғы рет қашан өзгергенінен есептеледі. Жаңа
+    пайдаланушының бірінші тексеруі username хэші бойынша интервал ішіне
+    таратылады. Жалпы және университет бойынша параллельдік шектеледі.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = GRADE_CHECK_CONCURRENCY,
+        per_univer: int = GRADE_CHECK_PER_UNIVER,
+        refresh: float = TARGETS_REFRESH,
+    ):
+        self.per_univer = per_univer
+        self.refresh = refresh
+        self._limit = asyncio.Semaphore(concurrency)
+        self._univer_limits: Dict[str, asyncio.Semaphore] = {}
+        # (due, user_id) — monotonic уақыт; _due-мен сәйкес келмейтін жазба ескірген
+        self._queue: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+        # Тексерілетін пайдаланушылар → университет коды
+        self._targets: Dict[str, str] = {}
+        # Бағасы соңғы өзгерген уақыт (time.time())
+        self._changed_at: Dict[str, float] = {}
+        self._period: Optional[str] = None
+        self._lags: List[float] = []
+        self.stats: Dict[str, Any] = {
+            "users": 0,
+            "checked": 0,
+            "changed": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "max_lag_s": None,
+            "avg_lag_s": None,
+        }
+
+    def _univer_limit(self, univer_code: str) -> asyncio.Semaphore:
+        limit = self._univer_limits.get(univer_code)
+        if limit is None:
+            limit = self._univer_limits[univer_code] = asyncio.Semaphore(self.per_univer)
+        return limit
+
+    @staticmethod
+    def _offset(user_id: str) -> float:
+        """Пайдаланушының интервал ішіндегі тұрақты орны [0, 1)"""
+        return int(hashlib.sha1(user_id.encode()).hexdigest()[:8], 16) / 0x100000000
+
+    def base_interval(self, now: Optional[datetime] = None) -> float:
+        """Кезең мен тәулік уақытына сәйкес интервал"""
+        now = now or datetime.now()
+        interval = PERIOD_INTERVALS[academic_period(now.date())]
+        if now.hour in NIGHT_HOURS:
+            interval *= NIGHT_FACTOR
+        return interval
+
+    def interval(self, user_id: str, now: Optional[datetime] = None) -> float:
+        interval = self.base_interval(now)
+        changed_at = self._changed_at.get(user_id)
+        if changed_at is not None and time.time() - changed_at < RECENT_CHANGE_WINDOW:
+            interval *= RECENT_CHANGE_FACTOR
+        return max(interval, MIN_INTERVAL)
+
+    def _schedule(self, user_id: str, due: float):
+        self._due[user_id] = due
+        heapq.heappush(self._queue, (due, user_id))
+
+    def sync(self, targets: List[Tuple[str, str]]):
+        """Пайдаланушылар тізімін жаңарту: targets — (user_id, univer_code)"""
+        current = dict(targets)
+        now = time.monotonic()
+        for user_id in list(self._targets):
+            if user_id not in current:
+                # Кезектегі жазбасы pop кезінде ескірген деп өткізіледі
+                del self._targets[user_id]
+                self._due.pop(user_id, None)
+                self._changed_at.pop(user_id, None)
+        for user_id, univer_code in current.items():
+            if user_id not in self._targets:
+                self._schedule(user_id, now + self._offset(user_id) * self.interval(user_id))
+            self._targets[user_id] = univer_code
+
+        period = academic_period()
+        if period != self._period:
+            self._period = period
+            print(f"Grade polling period: {period}, interval {self.base_interval():.0f}s")
+
+        self.stats["users"] = len(self._targets)
+        # Соңғы refresh аралығындағы ең үлкен кешігу
+        if self._lags:
+            self.stats["max_lag_s"] = round(max(self._lags), 2)
+            self._lags = []
+
+    async def _check(self, due: float, user_id: str, check: Callable[[str], Awaitable[Any]]):
+        self.stats["in_flight"] += 1
+        try:
+            async with self._univer_limit(self._targets.get(user_id, "")), self._limit:
+                # Кешігу: жоспарланған уақыт пен нақты басталу арасы
+                lag = time.monotonic() - due
+                self._lags.append(lag)
+                avg = self.stats["avg_lag_s"]
+                self.stats["avg_lag_s"] = round(lag if avg is None else 0.2 * lag + 0.8 * avg, 2)
+                try:
+                    if await check(user_id):
+                        self._changed_at[user_id] = time.time()
+                        self.stats["changed"] += 1
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"Error checking grades for {user_id}: {e}")
+                self.stats["checked"] += 1
+        finally:
+            self.stats["in_flight"] -= 1
+            # Тізімнен шықпаса — келесі тексеру жаңа интервалмен
+            if user_id in self._targets:
+                jitter = random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER)
+                self._schedule(user_id, time.monotonic() + self.interval(user_id) * jitter)
+
+    async def run(
+        self,
+        load_targets: Callable[[], List[Tuple[str, str]]],
+        check: Callable[[str], Awaitable[Any]],
+    ):
+        """
+        Тоқтатылғанша жұмыс істейді. load_targets — refresh сайын шақырылады;
+        check(user_id) бағалар өзгерсе True қайтарады.
+        """
+        tasks: Set[asyncio.Task] = set()
+        next_sync = 0.0
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= next_sync:
+                    self.sync(load_targets())
+                    next_sync = now + self.refresh
+
+                while self._queue and self._queue[0][0] <= now:
+                    due, user_id = heapq.heappop(self._queue)
+                    if self._due.get(user_id) != due:
+                        continue
+                    # Тексеру біткенше кезекте болмайды
+                    del self._due[user_id]
+                    task = asyncio.create_task(self._check(due, user_id, check))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                wake = min(self._queue[0][0], next_sync) if self._queue else next_sync
+                await asyncio.sleep(max(wake - time.monotonic(), 0))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(
+            self.stats,
+            queued=len(self._due),
+            period=self._period,
+            interval_s=self.base_interval(),
+        )
@@ -0,0 +1,77 @@
+"""
+Бағалар күйі - журналдың ықшам fingerprint-тері және тек өзгерген пәндерді салыстыру
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# (күйдегі өріс, журналдағы атауы, хабарламадағы атауы)
+GRADE_FIELDS = (
+    ("ab1", "АБ1", "АБ1"),
+    ("ab2", "АБ2", "АБ2"),
+    ("exam", "АА", "Емтихан"),
+)
+
+# (пән, хабарламадағы атауы, жаңа баға)
+GradeChange = Tuple[str, str, Any]
+
+
+def fingerprint(value: Any) -> str:
+    """JSON-ға айналатын мәннің қысқа хэші"""
+    data = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+
+def normalize_journal(attestations: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """platonus_get_attestation нәтижесі → {пән: [ab1, ab2, exam]}"""
+    journal = {}
+    for att in attestations:
+        # attestation is a list of [name, value, active]
+        # e.g. [["АБ1", 88.67, False], ["АБ2", 0, True], ["АА", 0, True]]
+        marks = {m[0]: m[1] for m in att["attestation"]}
+        journal[att["subject"]] = [marks.get(name, 0.0) for _, name, _ in GRADE_FIELDS]
+    return journal
+
+
+def diff_grades(
+    old_state: Optional[Dict[str, Any]], attestations: List[Dict[str, Any]]
+) -> Tuple[Optional[Dict[str, Any]], List[GradeChange]]:
+    """
+    Пайдаланушының сақталған күйін жаңа журналмен салыстыру.
+
+    Күй: {"fp": журнал хэші, "subjects": {пән: {"fp": бағалар хэші, "ab1", "ab2", "exam"}}}.
+    Журнал хэші өзгермесе бірден (None, []) қайтарылады — күйді жазу керек емес.
+    Әйтпесе тек хэші өзгерген пәндердің өрістері салыстырылады; АБ1, АБ2 және
+    емтихан бір-біріне тәуелсіз тексеріледі. Күй әлі жоқ болса журнал тек
+    бастапқы нүкте ретінде сақталады — бар бағалар жаңа деп хабарланбайды.
+    """
+    baseline = not old_state
+    old_state = old_state or {}
+    journal = normalize_journal(attestations)
+    journal_fp = fingerprint(journal)
+    if old_state.get("fp") == journal_fp:
+        return None, []
+
+    # Ескі формат: {пән: {"ab1", "ab2", "exam"}} — хэштері жоқ, өрістер салыстырылады
+    old_subjects = old_state["subjects"] if "fp" in old_state else old_state
+    # Бос журнал көбіне порталдың уақытша қатесі — бар бағаларды өшірмейміз
+    if not journal and old_subjects:
+        return None, []
+
+    subjects = {}
+    changes: List[GradeChange] = []
+    for subject, values in journal.items():
+        subject_fp = fingerprint(values)
+        old = old_subjects.get(subject) or {}
+        if old.get("fp") == subject_fp:
+            subjects[subject] = old
+            continue
+        entry = {"fp": subject_fp}
+        for (field, _, label), value in zip(GRADE_FIELDS, values):
+            entry[field] = value
+            if value and value != old.get(field) and not baseline:
+                changes.append((subject, label, value))
+        subjects[subject] = entry
+
+    return {"fp": journal_fp, "subjects": subjects}, changes
@@ -0,0 +1,89 @@
+"""
+Сабақ ескертулері - күн сайын құрылатын минут → (пайдаланушы, сабақ) индексі
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+# Тәуліктегі минуттар саны
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_REMINDER_MINUTES = 10
+
+# (user_id, сабақ, қанша минут қалды)
+Reminder = Tuple[str, Dict[str, Any], int]
+
+
+def lesson_start_minute(lesson: Dict[str, Any]) -> Optional[int]:
+    """Сабақтың басталу минуты: "time" өрісі "08:00" немесе "08:00-08:50" түрінде"""
+    try:
+        hour, minute = map(int, str(lesson.get("time", "")).split("-")[0].strip().split(":"))
+    except ValueError:
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return hour * 60 + minute
+
+
+class LessonReminderIndex:
+    """
+    Бір күннің ескертулері тәулік минуты бойынша топталған: әр тик тек
+    сол минуттың тізімін алады, сондықтан жұмыс көлемі жазылушылар
+    санына тәуелсіз. Пайдаланушының сабақтары да сақталады — параметрі
+    өзгерсе тек соның жазбалары қайта есептеледі.
+    """
+
+    def __init__(self):
+        self.day: Optional[date] = None
+        self._buckets: Dict[int, List[Reminder]] = {}
+        self._lessons: Dict[str, List[Dict[str, Any]]] = {}
+        self._minutes: Dict[str, List[int]] = {}
+
+    def reset(self, day: date):
+        self.day = day
+        self._buckets = {}
+        self._lessons = {}
+        self._minutes = {}
+
+    def add_user(
+        self,
+        user_id: str,
+        lessons: List[Dict[str, Any]],
+        minutes_before: int,
+        since: Optional[int] = None,
+    ):
+        """since — өңделіп қойған соңғы минут; одан ерте ескертулер қосылмайды"""
+        self.remove_user(user_id)
+        self._lessons[user_id] = lessons
+        minutes = []
+        for lesson in lessons:
+            start = lesson_start_minute(lesson)
+            if start is None:
+                continue
+            minute = start - minutes_before
+            if minute < 0 or (since is not None and minute <= since):
+                continue
+            self._buckets.setdefault(minute, []).append((user_id, lesson, minutes_before))
+            minutes.append(minute)
+        self._minutes[user_id] = minutes
+
+    def remove_user(self, user_id: str):
+        self._lessons.pop(user_id, None)
+        for minute in self._minutes.pop(user_id, []):
+            bucket = self._buckets.get(minute)
+            if bucket:
+                bucket[:] = [item for item in bucket if item[0] != user_id]
+
+    def reindex_user(self, user_id: str, minutes_before: int, since: Optional[int] = None):
+        """Ескерту уақыты өзгерді — сақталған сабақтармен қайта орналастыру"""
+        lessons = self._lessons.get(user_id)
+        if lessons is not None:
+            self.add_user(user_id, lessons, minutes_before, since)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._lessons
+
+    def pop(self, minute: int) -> List[Reminder]:
+        return self._buckets.pop(minute, [])
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
@@ -0,0 +1,199 @@
+"""
+Хабарлама тарихы - пайдаланушы бойынша шектеулі ring buffer, id → slot индексі және SQLite
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional
+
+# Әр пайдаланушы үшін сақталатын хабарламалар саны
+HISTORY_LIMIT = 100
+
+
+class UserHistory:
+    """
+    Бір пайдаланушының тарихы: limit ұяшықты ring buffer.
+    seq — хабарламаның реттік нөмірі, ұяшығы seq % limit.
+    Қосу, белгілеу және жою O(1); толса ең ескі хабарлама үстінен жазылады.
+    """
+
+    __slots__ = ("limit", "slots", "seqs", "index", "next_seq")
+
+    def __init__(self, limit: int = HISTORY_LIMIT):
+        self.limit = limit
+        self.slots: List[Optional[Dict[str, Any]]] = [None] * limit
+        self.seqs: List[int] = [0] * limit
+        # notification id → ұяшық
+        self.index: Dict[str, int] = {}
+        self.next_seq = 0
+
+    def put(self, seq: int, notification: Dict[str, Any]) -> int:
+        slot = seq % self.limit
+        evicted = self.slots[slot]
+        if evicted is not None:
+            self.index.pop(evicted["id"], None)
+        self.slots[slot] = notification
+        self.seqs[slot] = seq
+        self.index[notification["id"]] = slot
+        self.next_seq = max(self.next_seq, seq + 1)
+        return slot
+
+    def append(self, notification: Dict[str, Any]) -> int:
+        return self.put(self.next_seq, notification)
+
+    def find(self, notification_id: str) -> Optional[int]:
+        return self.index.get(notification_id)
+
+    def remove(self, notification_id: str) -> Optional[int]:
+        slot = self.index.pop(notification_id, None)
+        if slot is not None:
+            self.slots[slot] = None
+        return slot
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Ең жаңасынан бастап"""
+        last = self.next_seq - 1
+        for seq in range(last, max(last - self.limit, -1), -1):
+            notification = self.slots[seq % self.limit]
+            if notification is not None:
+                yield notification
+
+
+class NotificationHistory:
+    """
+    Барлық пайдаланушылардың тарихы. Жадқа пайдаланушы бірінші рет
+    сұралғанда жүктеледі; базаға тек өзгерген жол жазылады
+    (PRIMARY KEY (user_id, slot), сондықтан ескі хабарлама жаңасымен алмасады).
+    writer берілсе жазулар write-behind thread-інде топтап орындалады.
+    """
+
+    def __init__(self, db: sqlite3.Connection, limit: int = HISTORY_LIMIT, writer: Any = None):
+        self.db = db
+        self.limit = limit
+        self.writer = writer
+        self.path = db.execute("PRAGMA database_list").fetchone()[2]
+        self._users: Dict[str, UserHistory] = {}
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notification_history (
+                user_id TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (user_id, slot)
+            )
+            """
+        )
+
+    def _row(self, user_id: str, slot: int, seq: int, notification: Dict[str, Any]) -> tuple:
+        return (user_id, slot, seq, notification["id"], json.dumps(notification, ensure_ascii=False))
+
+    def _execute(self, key: tuple, sql: str, params: tuple):
+        if self.writer is not None:
+            self.writer.execute(self.path, ("notification_history",) + key, sql, params)
+        else:
+            self.db.execute(sql, params)
+
+    def _write_slot(self, user_id: str, history: UserHistory, slot: int):
+        """Ұяшықтың толық жолын жазу (write-behind кезегінде алдыңғы өзгерісті алмастырады)"""
+        self._execute(
+            (user_id, slot),
+            "INSERT OR REPLACE INTO notification_history (user_id, slot, seq, id, value) "
+            "VALUES (?, ?, ?, ?, ?)",
+            self._row(user_id, slot, history.seqs[slot], history.slots[slot]),
+        )
+
+    def user(self, user_id: str) -> UserHistory:
+        history = self._users.get(user_id)
+        if history is None:
+            history = UserHistory(self.limit)
+            rows = self.db.execute(
+                "SELECT seq, value FROM notification_history WHERE user_id = ? ORDER BY seq",
+                (user_id,),
+            )
+            for seq, value in rows:
+                history.put(seq, json.loads(value))
+            self._users[user_id] = history
+        return history
+
+    def add(self, user_id: str, notification: Dict[str, Any]):
+        history = self.user(user_id)
+        slot = history.append(notification)
+        self._write_slot(user_id, history, slot)
+
+    def page(self, user_id: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        result = []
+        for i, notification in enumerate(self.user(user_id)):
+            if i >= offset + limit:
+                break
+            if i >= offset:
+                result.append(notification)
+        return result
+
+    def update(self, user_id: str, notification_id: str, **fields: Any) -> bool:
+        history = self.user(user_id)
+        slot = history.find(notification_id)
+        if slot is None:
+            return False
+        history.slots[slot].update(fields)
+        self._write_slot(user_id, history, slot)
+        return True
+
+    def delete(self, user_id: str, notification_id: str) -> bool:
+        slot = self.user(user_id).remove(notification_id)
+        if slot is None:
+            return False
+        self._execute(
+            (user_id, slot),
+            "DELETE FROM notification_history WHERE user_id = ? AND slot = ?",
+            (user_id, slot),
+        )
+        return True
+
+    def clear(self, user_id: str) -> bool:
+        existed = len(self.user(user_id)) > 0
+        self._users[user_id] = UserHistory(self.limit)
+        self._execute(
+            (user_id, "*"), "DELETE FROM notification_history WHERE user_id = ?", (user_id,)
+        )
+        return existed
+
+    def migrate_json(self, path: str) -> int:
+        """Ескі notification_history.json-нан бір реттік көшіру (кесте бос болса)"""
+        if not os.path.exists(path):
+            return 0
+        if self.db.execute("SELECT 1 FROM notification_history LIMIT 1").fetchone():
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error reading {path} for migration: {e}")
+            return 0
+
+        rows = []
+        for user_id, notifications in data.items():
+            # Файлда ең жаңасы бірінші тұр — seq ескісінен бастап беріледі
+            recent = list(reversed(notifications[: self.limit]))
+            for seq, notification in enumerate(recent):
+                rows.append(self._row(user_id, seq % self.limit, seq, notification))
+
+        self.db.execute("BEGIN")
+        try:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO notification_history (user_id, slot, seq, id, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        os.replace(path, path + ".migrated")
+        print(f"Migrated {len(rows)} notifications from {path}")
+        return len(rows)
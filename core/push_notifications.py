@@ -6,10 +6,21 @@ import json
 import asyncio
 import os
 import base64
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 from datetime import datetime, timedelta
-from pywebpush import webpush, WebPushException
 from py_vapid import Vapid
+from functions.portal_health import portal_health
+from broadcast import DEFERRED, FAILED, SENT, BroadcastJob, broadcast_engine
+from grade_scheduler import GradePollScheduler
+from grade_state import diff_grades
+from lesson_reminders import DEFAULT_REMINDER_MINUTES, LessonReminderIndex
+from notification_history import NotificationHistory
+from push_sender import PushSendError, push_sender
+from response_cache import attestation_cache, credentials_owner, user_cache_key
+from database import data_path, get_database
+from timer_heap import TimerHeap, next_occurrence
+from utils.sqlite_storage import SqliteStorage
+from utils.write_behind import persistence
 
 # VAPID кілттері
 VAPID_PRIVATE_KEY_PATH = "vapid_private.pem"
@@ -28,10 +39,27 @@ def decode_credentials(encoded: str) -> tuple[str, str] | None:
     return None
 
 
-# Subscription деректерін сақтау үшін файл
-SUBSCRIPTIONS_FILE = "subscriptions.json"
-LAST_STATE_FILE = "last_state.json"
-NOTIFICATION_HISTORY_FILE = "notification_history.json"
+# Базаға көшірілетін ескі JSON файлдары
+SUBSCRIPTIONS_FILE = data_path("subscriptions.json")
+LAST_STATE_FILE = data_path("last_state.json")
+NOTIFICATION_HISTORY_FILE = data_path("notification_history.json")
+
+# Хабарлама параметрлерінің жалаушалары — әрқайсысы индекстелген баған
+SETTINGS_FLAGS = ("new_grades", "lesson_reminders", "tomorrow_schedule", "exam_reminders")
+# Тыныш сағаттарда кейінге қалдырылатын хабарламалар саны (пайдаланушыға)
+DEFERRED_LIMIT = 20
+# Күн басында бір уақытта жүктелетін пайдаланушы сабақтары
+LESSON_LOAD_CONCURRENCY = int(os.environ.get("LESSON_LOAD_CONCURRENCY", 10))
+
+
+def _settings_flag(flag: str):
+    return lambda sub: int(bool(sub.get("settings", {}).get(flag, True)))
+
+
+SUBSCRIPTION_INDEXES = {
+    "univer_code": lambda sub: sub.get("univer_code"),
+    **{flag: _settings_flag(flag) for flag in SETTINGS_FLAGS},
+}
 
 
 class PushNotificationService:
@@ -39,10 +67,35 @@ class PushNotificationService:
 
     def __init__(self):
         self._init_vapid()
-        self.subscriptions: Dict[str, Dict[str, Any]] = self._load_subscriptions()
-        self.notification_history: Dict[str, List[Dict[str, Any]]] = (
-            self._load_notification_history()
+        self.deferred_timers = TimerHeap()
+        # Жазылу немесе параметрлер өзгергенде шақырылады (user_id)
+        self.listeners: List[Callable[[str], None]] = []
+
+    def init(self):
+        """Кестелерді ашу және ескі JSON файлдарын көшіру (сервер қосылғанда бір рет)"""
+        database = get_database()
+        self.subscriptions = SqliteStorage(
+            database, "subscriptions", indexed=SUBSCRIPTION_INDEXES, writer=persistence
         )
+        # Ескі subscriptions.json бар болса — бір рет базаға көшіреміз
+        self.subscriptions.migrate_json(SUBSCRIPTIONS_FILE)
+        self.notification_history = NotificationHistory(database, writer=persistence)
+        self.notification_history.migrate_json(NOTIFICATION_HISTORY_FILE)
+        # Тыныш сағаттарда жіберілмеген хабарламалар — терезе біткенде жіберіледі
+        self.deferred = SqliteStorage(database, "deferred_notifications", writer=persistence)
+        for user_id in self.deferred.keys():
+            self._schedule_release(user_id)
+
+    def _changed(self, user_id: str):
+        """Бір пайдаланушының жазбасы өзгерді — тек соның таймерлері қайта есептеледі"""
+        if user_id in self.deferred:
+            if user_id in self.subscriptions:
+                self._schedule_release(user_id)
+            else:
+                del self.deferred[user_id]
+                self.deferred_timers.cancel(user_id)
+        for listener in self.listeners:
+            listener(user_id)
 
     def _init_vapid(self):
         """VAPID кілттерін жүктеу немесе генерациялау"""
@@ -62,22 +115,6 @@ class PushNotificationService:
         if not os.path.exists("vapid_public.pem"):
             self.vapid.save_public_key("vapid_public.pem")
 
-    def _load_subscriptions(self) -> Dict[str, Dict[str, Any]]:
-        """Файлдан жазылуларды жүктеу"""
-        try:
-            with open(SUBSCRIPTIONS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-
-    def _save_subscriptions(self):
-        """Жазылуларды файлға сақтау"""
-        try:
-            with open(SUBSCRIPTIONS_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.subscriptions, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving subscriptions: {e}")
-
     def subscribe(
         self,
         user_id: str,
@@ -116,23 +153,26 @@ class PushNotificationService:
             "time_settings": default_time_settings,
             "updated_at": datetime.now().isoformat(),
         }
-        self._save_subscriptions()
+        self._changed(user_id)
         return True
 
     def unsubscribe(self, user_id: str) -> bool:
         """Пайдаланушыны хабарламалардан шығару"""
         if user_id in self.subscriptions:
             del self.subscriptions[user_id]
-            self._save_subscriptions()
+            self._changed(user_id)
             return True
         return False
 
     def update_settings(self, user_id: str, settings: Dict[str, bool]) -> bool:
         """Хабарлама параметрлерін жаңарту"""
         if user_id in self.subscriptions:
-            self.subscriptions[user_id]["settings"] = settings
-            self.subscriptions[user_id]["updated_at"] = datetime.now().isoformat()
-            self._save_subscriptions()
+            # Жазба көшірмесін өзгертіп, бір жолды қайта жазамыз
+            sub_data = dict(self.subscriptions[user_id])
+            sub_data["settings"] = settings
+            sub_data["updated_at"] = datetime.now().isoformat()
+            self.subscriptions[user_id] = sub_data
+            self._changed(user_id)
             return True
         return False
 
@@ -154,22 +194,6 @@ class PushNotificationService:
         """Пайдаланушы жазылған ба тексеру"""
         return user_id in self.subscriptions
 
-    def _load_notification_history(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Хабарлама тарихын жүктеу"""
-        try:
-            with open(NOTIFICATION_HISTORY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-
-    def _save_notification_history(self):
-        """Хабарлама тарихын сақтау"""
-        try:
-            with open(NOTIFICATION_HISTORY_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.notification_history, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving notification history: {e}")
-
     def _add_to_history(
         self,
         user_id: str,
@@ -183,9 +207,6 @@ class PushNotificationService:
 
         notification_id = str(uuid.uuid4())
 
-        if user_id not in self.notification_history:
-            self.notification_history[user_id] = []
-
         notification = {
             "id": notification_id,
             "type": notification_type,
@@ -197,75 +218,38 @@ class PushNotificationService:
             "clicked": False,
         }
 
-        self.notification_history[user_id].insert(0, notification)
-
-        # Тек соңғы 100 хабарламаны сақтау
-        if len(self.notification_history[user_id]) > 100:
-            self.notification_history[user_id] = self.notification_history[user_id][
-                :100
-            ]
-
-        self._save_notification_history()
+        # Тек соңғы 100 хабарлама сақталады — ең ескісінің орнына жазылады
+        self.notification_history.add(user_id, notification)
         return notification_id
 
     def get_notification_history(
         self, user_id: str, limit: int = 50, offset: int = 0
     ) -> List[Dict[str, Any]]:
         """Пайдаланушының хабарлама тарихын алу"""
-        history = self.notification_history.get(user_id, [])
-        return history[offset : offset + limit]
+        return self.notification_history.page(user_id, limit, offset)
 
     def mark_notification_read(self, user_id: str, notification_id: str) -> bool:
         """Хабарламаны оқылған деп белгілеу"""
-        if user_id not in self.notification_history:
-            return False
-
-        for notification in self.notification_history[user_id]:
-            if notification["id"] == notification_id:
-                notification["read"] = True
-                self._save_notification_history()
-                return True
-        return False
+        return self.notification_history.update(user_id, notification_id, read=True)
 
     def mark_notification_clicked(self, user_id: str, notification_id: str) -> bool:
         """Хабарламаны басылған деп белгілеу"""
-        if user_id not in self.notification_history:
-            return False
-
-        for notification in self.notification_history[user_id]:
-            if notification["id"] == notification_id:
-                notification["clicked"] = True
-                notification["read"] = True  # Басылса автоматты оқылған
-                self._save_notification_history()
-                return True
-        return False
+        # Басылса автоматты оқылған
+        return self.notification_history.update(
+            user_id, notification_id, clicked=True, read=True
+        )
 
     def delete_notification(self, user_id: str, notification_id: str) -> bool:
         """Хабарламаны жою"""
-        if user_id not in self.notification_history:
-            return False
-
-        original_length = len(self.notification_history[user_id])
-        self.notification_history[user_id] = [
-            n for n in self.notification_history[user_id] if n["id"] != notification_id
-        ]
-
-        if len(self.notification_history[user_id]) < original_length:
-            self._save_notification_history()
-            return True
-        return False
+        return self.notification_history.delete(user_id, notification_id)
 
     def clear_notification_history(self, user_id: str) -> bool:
         """Барлық хабарлама тарихын тазалау"""
-        if user_id in self.notification_history:
-            self.notification_history[user_id] = []
-            self._save_notification_history()
-            return True
-        return False
+        return self.notification_history.clear(user_id)
 
     def get_notification_stats(self, user_id: str) -> Dict[str, Any]:
         """Хабарлама статистикасын алу"""
-        history = self.notification_history.get(user_id, [])
+        history = self.notification_history.user(user_id)
 
         if not history:
             return {
@@ -310,9 +294,12 @@ class PushNotificationService:
     def update_time_settings(self, user_id: str, time_settings: Dict[str, Any]) -> bool:
         """Уақыт параметрлерін жаңарту"""
         if user_id in self.subscriptions:
-            self.subscriptions[user_id]["time_settings"] = time_settings
-            self.subscriptions[user_id]["updated_at"] = datetime.now().isoformat()
-            self._save_subscriptions()
+            # Жазба көшірмесін өзгертіп, бір жолды қайта жазамыз
+            sub_data = dict(self.subscriptions[user_id])
+            sub_data["time_settings"] = time_settings
+            sub_data["updated_at"] = datetime.now().isoformat()
+            self.subscriptions[user_id] = sub_data
+            self._changed(user_id)
             return True
         return False
 
@@ -351,6 +338,47 @@ class PushNotificationService:
         else:
             return start_time <= current_time < end_time
 
+    def _schedule_release(self, user_id: str):
+        """Кейінге қалдырылған хабарламаларды тыныш сағаттар біткенде жіберуге қою"""
+        quiet_hours = (self.get_time_settings(user_id) or {}).get("quiet_hours", {})
+        if self.is_quiet_hours(user_id):
+            when = next_occurrence(quiet_hours.get("end", "07:00"), default="07:00")
+        else:
+            when = datetime.now().timestamp()
+        self.deferred_timers.schedule(user_id, when)
+
+    def _defer(self, user_id: str, payload: Dict[str, Any]):
+        """Хабарламаны кейінге қалдыру; бірдей tag-тің тек соңғысы сақталады"""
+        queue = [
+            item
+            for item in self.deferred.get(user_id, [])
+            if not payload.get("tag") or item.get("tag") != payload["tag"]
+        ]
+        queue.append(payload)
+        self.deferred[user_id] = queue[-DEFERRED_LIMIT:]
+        if user_id not in self.deferred_timers:
+            self._schedule_release(user_id)
+
+    async def release_deferred(self, user_id: str) -> int:
+        """Тыныш сағаттар біткенде кейінге қалдырылған хабарламаларды жіберу"""
+        if self.is_quiet_hours(user_id):
+            # Параметрлер өзгерген — терезе әлі біткен жоқ
+            self._schedule_release(user_id)
+            return 0
+        queue = self.deferred.get(user_id, [])
+        if user_id in self.deferred:
+            del self.deferred[user_id]
+        sub_data = self.subscriptions.get(user_id)
+        if not sub_data:
+            return 0
+        sent = 0
+        for payload in queue:
+            if await self._push(user_id, sub_data["subscription"], payload):
+                sent += 1
+            elif user_id not in self.subscriptions:
+                break
+        return sent
+
     async def send_notification(
         self,
         user_id: str,
@@ -371,15 +399,6 @@ class PushNotificationService:
         if not sub_data:
             return False
 
-        # Тыныш сағаттарды тексеру
-        if self.is_quiet_hours(user_id):
-            print(f"Quiet hours active for {user_id}, skipping notification")
-            # Тарихқа қосамыз, бірақ жібермейміз
-            self._add_to_history(user_id, notification_type, title, body, data)
-            return False
-
-        subscription = sub_data["subscription"]
-
         payload = {
             "title": title,
             "body": body,
@@ -398,31 +417,54 @@ class PushNotificationService:
         if vibrate:
             payload["vibrate"] = vibrate
 
-        try:
-            webpush(
-                subscription_info=subscription,
-                data=json.dumps(payload),
-                vapid_private_key=VAPID_PRIVATE_KEY_PATH,
-                vapid_claims=VAPID_CLAIMS,
-            )
-            # Тарихқа қосу
+        # Тыныш сағаттарды тексеру
+        if self.is_quiet_hours(user_id):
+            print(f"Quiet hours active for {user_id}, deferring notification")
+            # Тарихқа қазір қосамыз, ал push терезе біткенде жіберіледі
+            self._defer(user_id, payload)
             self._add_to_history(user_id, notification_type, title, body, data)
+            return False
+
+        if not await self._push(user_id, sub_data["subscription"], payload):
+            return False
+        # Тарихқа қосу
+        self._add_to_history(user_id, notification_type, title, body, data)
+        return True
+
+    async def _push(self, user_id: str, subscription: Dict[str, Any], payload: Dict[str, Any]) -> bool:
+        """Дайын payload-ты жіберу; subscription жарамсыз болса өшіріледі"""
+        try:
+            await push_sender.send(subscription, json.dumps(payload), self.vapid, VAPID_CLAIMS)
             return True
-        except WebPushException as e:
+        except PushSendError as e:
             print(f"Push error for {user_id}: {e}")
             # Subscription жарамсыз болса, өшіру
-            if e.response and e.response.status_code in [404, 410]:
+            if e.status in [404, 410]:
                 self.unsubscribe(user_id)
             return False
 
+    async def _broadcast_one(self, user_id: str, title: str, body: str, **kwargs) -> str:
+        """Тарату үшін бір жіберу: тыныш сағаттағы пайдаланушы қате емес, кейінге қалдырылған"""
+        quiet = self.is_quiet_hours(user_id)
+        if await self.send_notification(user_id, title, body, **kwargs):
+            return SENT
+        return DEFERRED if quiet and user_id in self.deferred else FAILED
+
+    def start_broadcast(self, title: str, body: str, **kwargs) -> BroadcastJob:
+        """Барлық жазылушыларға таратуды фонда бастау (нәтижені күтпейді)"""
+        targets = [
+            (user_id, sub_data.get("subscription", {}).get("endpoint"))
+            for user_id, sub_data in self.subscriptions.items()
+        ]
+        return broadcast_engine.start(
+            targets,
+            lambda user_id: self._broadcast_one(user_id, title, body, **kwargs),
+        )
+
     async def send_to_all(self, title: str, body: str, **kwargs) -> Dict[str, bool]:
-        """Барлық жазылған пайдаланушыларға хабарлама жіберу"""
-        results = {}
-        for user_id in list(self.subscriptions.keys()):
-            results[user_id] = await self.send_notification(
-                user_id, title, body, **kwargs
-            )
-        return results
+        """Барлық жазылған пайдаланушыларға хабарлама жіберу (кейінге қалдырылғаны да жеткізіледі)"""
+        results = await self.start_broadcast(title, body, **kwargs).wait()
+        return {user_id: result != FAILED for user_id, result in results.items()}
 
     # Арнайы хабарлама түрлері
     async def send_new_grade_notification(
@@ -525,169 +567,333 @@ class ScheduledNotifications:
     def __init__(self, push_service: PushNotificationService):
         self.push_service = push_service
         self.running = False
+        self.grade_scheduler = GradePollScheduler()
+        self._tasks: List[asyncio.Task] = []
+        # Әр пайдаланушының ертеңгі кестені алатын келесі уақыты
+        self.evening_timers = TimerHeap()
+        push_service.listeners.append(self._schedule_evening)
+        # Бүгінгі сабақ ескертулері: тәулік минуты → (пайдаланушы, сабақ)
+        self.lesson_reminders = LessonReminderIndex()
+        self._last_lesson_minute: Optional[int] = None
+        # Фонда жүктеліп жатқан сабақтар: user_id → task (тик оларды күтпейді)
+        self._lesson_loads: Dict[str, asyncio.Task] = {}
+        self._lesson_load_limit = asyncio.Semaphore(LESSON_LOAD_CONCURRENCY)
+        push_service.listeners.append(self._reindex_lessons)
+
+    def init(self):
+        """Тексерушінің кестелерін ашу (push_service.init()-тен кейін)"""
+        database = get_database()
+        # Тексеруші үшін пайдаланушы бойынша Platonus токендері (рестарттан кейін де сақталады)
+        self.checker_tokens = SqliteStorage(database, "checker_tokens", writer=persistence)
+        # Соңғы белгілі бағалар: жадқа жүктелмейді, әр пайдаланушы тексерілгенде оқылады
+        self.grade_states = SqliteStorage(
+            database, "grade_states", cache=False, writer=persistence
+        )
+        self.grade_states.migrate_json(LAST_STATE_FILE)
 
     async def start(self):
         """Фондық тапсырмаларды бастау"""
         self.running = True
-        asyncio.create_task(self._check_lessons_loop())
-        asyncio.create_task(self._evening_schedule_loop())
-        asyncio.create_task(self._check_grades_loop())
+        for user_id in self.push_service.subscriptions.keys():
+            self._schedule_evening(user_id)
+        self._tasks = [
+            asyncio.create_task(self._check_lessons_loop()),
+            asyncio.create_task(self._evening_schedule_loop()),
+            asyncio.create_task(self._deferred_release_loop()),
+            asyncio.create_task(self._check_grades_loop()),
+        ]
 
     async def stop(self):
         """Фондық тапсырмаларды тоқтату"""
         self.running = False
+        for task in self._tasks + list(self._lesson_loads.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
 
     async def _check_lessons_loop(self):
-        """Сабаққа 10 минут қалды ма тексеру (минут сайын)"""
+        """Сабаққа ескерту уақыты келді ме тексеру (әр минуттың басында)"""
         while self.running:
             try:
                 await self._check_upcoming_lessons()
             except Exception as e:
                 print(f"Lesson check error: {e}")
-            await asyncio.sleep(60)  # Минут сайын
+            await asyncio.sleep(60 - datetime.now().second)
 
     async def _check_grades_loop(self):
-        """Жаңа бағаларды тексеру (30 минут сайын)"""
+        """Жаңа бағаларды тексеру (интервал академиялық күнтізбеге және тәулік уақытына бейімделеді)"""
         while self.running:
             try:
-                await self._check_new_grades()
+                await self.grade_scheduler.run(self._grade_targets, self._check_user_grades)
             except Exception as e:
                 print(f"Grade check error: {e}")
-            await asyncio.sleep(1800)  # 30 минут
+                await asyncio.sleep(60)
+
+    def _schedule_evening(self, user_id: str):
+        """Бір пайдаланушының кешкі кесте таймерін қайта есептеу (O(log n))"""
+        sub_data = self.push_service.subscriptions.get(user_id)
+        if not sub_data or not sub_data.get("settings", {}).get("tomorrow_schedule", True):
+            self.evening_timers.cancel(user_id)
+            return
+        user_time = sub_data.get("time_settings", {}).get("evening_schedule_time", "22:00")
+        self.evening_timers.schedule(user_id, next_occurrence(user_time))
 
     async def _evening_schedule_loop(self):
-        """Кешкі уақытта ертеңгі кестені жіберу (икемді уақыт)"""
+        """Әр пайдаланушыға ертеңгі кестені өз уақытында жіберу (икемді уақыт)"""
         while self.running:
-            now = datetime.now()
-
-            # Барлық пайдаланушылардың уақытын тексеру
-            # Ең ерте уақытты табу
-            earliest_time = "22:00"  # Default
-            for sub_data in self.push_service.subscriptions.values():
-                time_settings = sub_data.get("time_settings", {})
-                user_time = time_settings.get("evening_schedule_time", "22:00")
-                if user_time < earliest_time:
-                    earliest_time = user_time
-
-            # Келесі уақытты есептеу
-            hour, minute = map(int, earliest_time.split(":"))
-            target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            if now >= target:
-                target += timedelta(days=1)
-
-            wait_seconds = (target - now).total_seconds()
-            print(
-                f"Evening schedule waiter: waiting {wait_seconds} seconds until {earliest_time}"
+            user_ids = await self.evening_timers.wait_due()
+            results = await asyncio.gather(
+                *(self._send_tomorrow_schedule(user_id) for user_id in user_ids),
+                return_exceptions=True,
             )
-            await asyncio.sleep(wait_seconds)
-
-            if self.running:
-                try:
-                    await self._send_tomorrow_schedules()
-                except Exception as e:
-                    print(f"Evening schedule error: {e}")
-                # Келесі күнді күту үшін сәл кідіріс
-                await asyncio.sleep(60)
+            for user_id, result in zip(user_ids, results):
+                if isinstance(result, Exception):
+                    print(f"Evening schedule error for {user_id}: {result}")
+                # Келесі күнгі уақыт
+                self._schedule_evening(user_id)
+
+    async def _deferred_release_loop(self):
+        """Тыныш сағаттар біткенде кейінге қалдырылған хабарламаларды жіберу"""
+        timers = self.push_service.deferred_timers
+        while self.running:
+            user_ids = await timers.wait_due()
+            results = await asyncio.gather(
+                *(self.push_service.release_deferred(user_id) for user_id in user_ids),
+                return_exceptions=True,
+            )
+            for user_id, result in zip(user_ids, results):
+                if isinstance(result, Exception):
+                    print(f"Deferred notifications error for {user_id}: {result}")
+
+    @staticmethod
+    def _reminder_minutes(sub_data: Dict[str, Any]) -> int:
+        minutes = sub_data.get("time_settings", {}).get(
+            "lesson_reminder_minutes", DEFAULT_REMINDER_MINUTES
+        )
+        try:
+            return int(minutes)
+        except (TypeError, ValueError):
+            return DEFAULT_REMINDER_MINUTES
+
+    def _reindex_lessons(self, user_id: str):
+        """Параметрлер өзгерді — тек осы пайдаланушының ескертулері қайта орналасады"""
+        sub_data = self.push_service.subscriptions.get(user_id)
+        if not sub_data or not sub_data.get("settings", {}).get("lesson_reminders", True):
+            self.lesson_reminders.remove_user(user_id)
+        elif user_id in self.lesson_reminders:
+            self.lesson_reminders.reindex_user(
+                user_id, self._reminder_minutes(sub_data), since=self._last_lesson_minute
+            )
+        elif self.lesson_reminders.day == datetime.now().date():
+            # Күн ортасында жазылған не ескертуді қайта қосқан — сабақтарын қазір жүктейміз
+            try:
+                self._start_lesson_load(user_id)
+            except RuntimeError:
+                return
+
+    def _start_lesson_load(self, user_id: str):
+        """Пайдаланушының сабақтарын фонда жүктеу (бір уақытта біреу ғана)"""
+        if user_id in self._lesson_loads:
+            return
+        task = asyncio.get_running_loop().create_task(self._index_user_lessons(user_id))
+        self._lesson_loads[user_id] = task
+
+        def done(_):
+            # Күн ауысқанда тоқтатылған ескі task жаңасын өшірмеуі керек
+            if self._lesson_loads.get(user_id) is task:
+                del self._lesson_loads[user_id]
+
+        task.add_done_callback(done)
+
+    async def _index_user_lessons(self, user_id: str):
+        """Бір пайдаланушының бүгінгі сабақтарын индекске қосу"""
+        day = self.lesson_reminders.day
+        sub_data = self.push_service.subscriptions.get(user_id)
+        if not sub_data:
+            return
+        try:
+            async with self._lesson_load_limit:
+                lessons = await self._load_lessons(user_id, sub_data, day)
+        except Exception as e:
+            print(f"Lesson load error for {user_id}: {e}")
+            return
+        # Жүктеу кезінде күн ауысса не параметр өшірілсе — қоспаймыз.
+        # Сабағы жоқ пайдаланушы да индексте — параметрі өзгерсе қайта жүктелмейді
+        sub_data = self.push_service.subscriptions.get(user_id)
+        if (
+            self.lesson_reminders.day != day
+            or not sub_data
+            or not sub_data.get("settings", {}).get("lesson_reminders", True)
+        ):
+            return
+        self.lesson_reminders.add_user(
+            user_id, lessons, self._reminder_minutes(sub_data), since=self._last_lesson_minute
+        )
+
+    def _build_lesson_reminders(self, day):
+        """
+        Күніне бір рет: индексті тазалап, ескертулері қосулы пайдаланушылардың
+        сабақтарын фонда параллель жүктеу (LESSON_LOAD_CONCURRENCY). Минут тигі
+        жүктеуді күтпейді — жүктелген пайдаланушылар индекске бірден қосылады.
+        """
+        # Кешегі аяқталмаған жүктеулер жаңа күнді бөгемеуі керек
+        for task in self._lesson_loads.values():
+            task.cancel()
+        self._lesson_loads = {}
+        self.lesson_reminders.reset(day)
+        for user_id in self.push_service.subscriptions.find(lesson_reminders=1):
+            self._start_lesson_load(user_id)
+
+    async def _load_lessons(self, user_id: str, sub_data: Dict[str, Any], day) -> List[Dict[str, Any]]:
+        """Пайдаланушының бір күнгі сабақтары (Platonus-та кесте жоқ)"""
+        return []
 
     async def _check_upcoming_lessons(self):
-        """Жақын сабақтарды тексеру (Platonus-та кесте жоқ)"""
-        pass
+        """Осы минутта ескертуі бар пайдаланушыларға ғана хабарлама жіберу"""
+        now = datetime.now()
+        if self.lesson_reminders.day != now.date():
+            self._build_lesson_reminders(now.date())
+            self._last_lesson_minute = None
+
+        minute = now.hour * 60 + now.minute
+        # Тик кешіксе өткізіп алған минуттарды да аламыз
+        first = minute if self._last_lesson_minute is None else self._last_lesson_minute + 1
+        reminders = []
+        for m in range(first, minute + 1):
+            reminders.extend(self.lesson_reminders.pop(m))
+        self._last_lesson_minute = minute
+
+        if not reminders:
+            return
+        results = await asyncio.gather(
+            *(
+                self.push_service.send_lesson_reminder(
+                    user_id,
+                    lesson.get("subject", ""),
+                    lesson.get("teacher", ""),
+                    lesson.get("room", ""),
+                    minutes_left,
+                )
+                for user_id, lesson, minutes_left in reminders
+            ),
+            return_exceptions=True,
+        )
+        for (user_id, _, _), result in zip(reminders, results):
+            if isinstance(result, Exception):
+                print(f"Lesson reminder error for {user_id}: {result}")
+
+    def _grade_targets(self) -> List[tuple]:
+        """Бағалары тексерілетін пайдаланушылар: (user_id, univer_code)"""
+        # Бағалар хабарламасы қосулы пайдаланушылар (индекс бойынша)
+        targets = []
+        for user_id in self.push_service.subscriptions.find(new_grades=1):
+            sub_data = self.push_service.subscriptions.get(user_id)
+            if sub_data:
+                targets.append((user_id, sub_data.get("univer_code", "kstu")))
+
+        # Тексерілмейтін пайдаланушылардың токендерін сақтамаймыз
+        active = {user_id for user_id, _ in targets}
+        for user_id in self.checker_tokens.keys():
+            if user_id not in active:
+                del self.checker_tokens[user_id]
+        return targets
+
+    async def _check_user_grades(self, user_id: str) -> bool:
+        """Бір пайдаланушының бағаларын тексеру; жаңа баға болса ғана True"""
+        sub_data = self.push_service.subscriptions.get(user_id)
+        if not sub_data or not sub_data.get("settings", {}).get("new_grades", True):
+            return False
 
-    async def _check_new_grades(self):
-        """Жаңа бағаларды тексеру"""
-        states = self._load_states()
+        # Порталдың circuit-і ашық болса — бұл циклде өткізіп жібереміз
+        univer_code = sub_data.get("univer_code", "kstu")
+        if not portal_health.is_available(univer_code):
+            return False
 
-        for user_id, sub_data in self.push_service.subscriptions.items():
-            # Бағалар хабарламасы қосулы ма тексеру
-            settings = sub_data.get("settings", {})
-            if not settings.get("new_grades", True):
-                continue
+        creds = decode_credentials(sub_data.get("creds", ""))
+        if not creds:
+            return False
+        username, password = creds
 
-            creds = decode_credentials(sub_data.get("creds", ""))
-            if not creds:
-                continue
-            username, password = creds
+        # Бағаларды алу
+        from datetime import date
+        today = date.today()
+        year = today.year - 1 if today.month < 9 else today.year
+        semester = 2 if today.month < 9 else 1
 
-            try:
-                # Platonus-қа логин жасау
-                from functions.platonus import platonus_login, platonus_get_attestation
-                pt_token = await platonus_login(username, password)
-                if not pt_token:
-                    continue
-
-                # Бағаларды алу
-                from datetime import date
-                today = date.today()
-                year = today.year - 1 if today.month < 9 else today.year
-                semester = 2 if today.month < 9 else 1
+        attestations = await self._fetch_attestation(
+            user_id, username, password, univer_code, year, semester
+        )
+        if attestations is None:
+            return False
 
-                attestations = await platonus_get_attestation(pt_token, year, semester)
-                if attestations is None:
-                    continue
-
-                current_grades = {}
-                for att in attestations:
-                    key = att["subject"]
-                    grades_dict = {}
-                    # attestation is a list of [name, value, active]
-                    # e.g. [["АБ1", 88.67, False], ["АБ2", 0, True], ["АА", 0, True]]
-                    marks = {m[0]: m[1] for m in att["attestation"]}
-                    grades_dict["ab1"] = marks.get("АБ1", 0.0)
-                    grades_dict["ab2"] = marks.get("АБ2", 0.0)
-                    grades_dict["exam"] = marks.get("АА", 0.0)
-                    current_grades[key] = grades_dict
-
-                last_user_state = states.get(user_id, {})
-
-                # Салыстыру
-                for subject, grades in current_grades.items():
-                    old_grades = last_user_state.get(subject, {})
-
-                    # АБ1 өзгерсе
-                    if grades["ab1"] != old_grades.get("ab1") and grades["ab1"]:
-                        await self.push_service.send_new_grade_notification(
-                            user_id, subject, str(grades["ab1"]), "АБ1"
-                        )
-
-                    # АБ2 өзгерсе
-                    elif grades["ab2"] != old_grades.get("ab2") and grades["ab2"]:
-                        await self.push_service.send_new_grade_notification(
-                            user_id, subject, str(grades["ab2"]), "АБ2"
-                        )
-
-                    # Емтихан өзгерсе
-                    elif grades["exam"] != old_grades.get("exam") and grades["exam"]:
-                        await self.push_service.send_new_grade_notification(
-                            user_id, subject, str(grades["exam"]), "Емтихан"
-                        )
-
-                # Жаңа күйді сақтау
-                states[user_id] = current_grades
+        # Журнал хэші өзгермесе — салыстыру да, жазу да жоқ
+        new_state, changes = diff_grades(self.grade_states.get(user_id), attestations)
+        if new_state is None:
+            return False
 
-            except Exception as e:
-                print(f"Error checking grades for {user_id}: {e}")
+        # Тек осы пайдаланушының жолы жазылады (write-behind, топтап commit)
+        self.grade_states[user_id] = new_state
+
+        # Бастапқы нүкте мен ескі форматтан көшіру — баға өзгерісі емес
+        if not changes:
+            return False
 
-        self._save_states(states)
+        for subject, label, value in changes:
+            await self.push_service.send_new_grade_notification(
+                user_id, subject, str(value), label
+            )
 
-    async def _send_tomorrow_schedules(self):
-        """Ертеңгі кестені жіберу (Platonus-та кесте жоқ)"""
-        pass
+        # Бағалар өзгерсе — API кэшіндегі ескі журналды тастаймыз
+        attestation_cache.invalidate_user(user_cache_key(univer_code, user_id))
+        return True
 
-    def _load_states(self) -> Dict[str, Any]:
-        """Соңғы күйлерді (бағаларды) файлдан жүктеу"""
-        try:
-            with open(LAST_STATE_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+    async def _fetch_attestation(
+        self,
+        user_id: str,
+        username: str,
+        password: str,
+        univer_code: str,
+        year: int,
+        semester: int,
+    ) -> Optional[List]:
+        """
+        Сақталған токенмен журналды алу. Токен жоқ немесе ескірген (None)
+        болса ғана ортақ platonus_refresh_login арқылы қайта логин жасалады.
+        """
+        from functions.platonus import (
+            PortalUnavailable,
+            platonus_get_attestation,
+            platonus_refresh_login,
+        )
+
+        owner = f"{univer_code}:{credentials_owner(username, password)}"
+        cached = self.checker_tokens.get(user_id)
+        pt_token = cached["pt"] if cached and cached.get("owner") == owner else None
 
-    def _save_states(self, states: Dict[str, Any]):
-        """Күйлерді файлға сақтау"""
         try:
-            with open(LAST_STATE_FILE, "w", encoding="utf-8") as f:
-                json.dump(states, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving states: {e}")
+            if pt_token:
+                attestations = await platonus_get_attestation(pt_token, year, semester)
+                if attestations is not None:
+                    return attestations
+
+            # Тексеру кезінде circuit ашылса — токенді ескірді деп санамаймыз
+            if not portal_health.is_available(univer_code):
+                return None
+            stale_pt = pt_token
+            pt_token = await platonus_refresh_login(
+                username, password, univer_code, stale_pt=stale_pt
+            )
+            if not pt_token:
+                return None
+            if pt_token != stale_pt:
+                self.checker_tokens[user_id] = {"pt": pt_token, "owner": owner}
+            return await platonus_get_attestation(pt_token, year, semester)
+        except PortalUnavailable:
+            return None
+
+    async def _send_tomorrow_schedule(self, user_id: str):
+        """Пайдаланушыға ертеңгі кестені жіберу (Platonus-та кесте жоқ)"""
+        pass
 
 
 scheduled_notifications = ScheduledNotifications(push_service)
@@ -0,0 +1,180 @@
+"""
+Web Push жіберу - шифрлау executor-да, жеткізу ортақ aiohttp пулы арқылы
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+import http_ece
+from cryptography.hazmat.primitives.asymmetric import ec
+from py_vapid import Vapid
+from pywebpush import WebPusher, WebPushException
+
+from utils.cache import SingleFlight, TTLCache
+from utils.http_client import HttpClient
+
+PUSH_TIMEOUT = aiohttp.ClientTimeout(total=10)
+# Құрылғы офлайн болса хабарлама сақталмайды (pywebpush.webpush default-ы сияқты)
+PUSH_TTL = 0
+PUSH_CONTENT_ENCODING = "aes128gcm"
+# VAPID JWT жарамдылығы (pywebpush сияқты 12 сағат)
+VAPID_EXPIRATION = 12 * 3600
+# VAPID JWT мерзімі біткенге дейін осынша уақыт қалғанда жаңасына қол қойылады
+VAPID_REFRESH_MARGIN = 3600
+# Декодталған subscription кілттерінің кэші
+SUBSCRIPTION_KEYS_CACHE_SIZE = 50000
+# Осыдан баяу жіберулер логқа жазылады (мс)
+SLOW_PUSH_MS = 2000
+# Орташа уақыттың EWMA коэффициенті
+EWMA_ALPHA = 0.2
+
+
+# (receiver public key, auth secret)
+SubscriptionKeys = Tuple[ec.EllipticCurvePublicKey, bytes]
+
+
+class PushSendError(Exception):
+    """Push сервисі хабарламаны қабылдамады; status — HTTP коды (желі қатесінде None)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class PushSender:
+    """
+    Web Push хабарламаларын event loop-ты бөгемей жібереді.
+
+    ECDH + AES-GCM шифрлау және VAPID қолтаңбасы thread pool-да орындалады,
+    HTTP POST push сервистеріне (FCM, Mozilla, Apple) keep-alive пул арқылы барады.
+    VAPID headers push сервисінің origin-і бойынша, ал декодталған p256dh/auth
+    кілттері subscription бойынша кэштеледі.
+    """
+
+    def __init__(self):
+        self.client = HttpClient(PUSH_TIMEOUT, limit=200, limit_per_host=50)
+        # origin → (қайта қол қою уақыты, VAPID headers)
+        self._vapid_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        self._signing = SingleFlight()
+        # (endpoint, p256dh, auth) → декодталған кілттер
+        self._keys = TTLCache(maxsize=SUBSCRIPTION_KEYS_CACHE_SIZE, ttl=24 * 3600)
+        self.sent = 0
+        self.failed = 0
+        self.latency_ms: Optional[float] = None
+        self.encrypt_ms: Optional[float] = None
+
+    @staticmethod
+    def _ewma(current: Optional[float], value: float) -> float:
+        return value if current is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * current
+
+    @staticmethod
+    def _load_keys(subscription_info: Dict[str, Any]) -> SubscriptionKeys:
+        """p256dh/auth кілттерін декодтау (WebPusher сияқты тексерумен)"""
+        pusher = WebPusher(subscription_info)
+        if not pusher.receiver_key or not pusher.auth_key:
+            raise WebPushException("No keys specified in subscription info")
+        receiver_key = ec.EllipticCurvePublicKey.from_encoded_point(
+            ec.SECP256R1(), pusher.receiver_key
+        )
+        return receiver_key, pusher.auth_key
+
+    @classmethod
+    def _encrypt(
+        cls, data: bytes, subscription_info: Dict[str, Any], keys: Optional[SubscriptionKeys]
+    ) -> Tuple[bytes, SubscriptionKeys]:
+        """Payload-ты шифрлау (thread pool-да орындалады)"""
+        if keys is None:
+            keys = cls._load_keys(subscription_info)
+        receiver_key, auth_key = keys
+        # Әр хабарламаға жаңа ephemeral ECDH кілті — бұл кэштелмейді
+        server_key = ec.generate_private_key(ec.SECP256R1())
+        body = http_ece.encrypt(
+            data,
+            private_key=server_key,
+            dh=receiver_key,
+            auth_secret=auth_key,
+            version=PUSH_CONTENT_ENCODING,
+        )
+        return body, keys
+
+    async def _vapid_headers(self, origin: str, vapid: Vapid, claims: Dict[str, Any]) -> Dict[str, str]:
+        """Push сервисінің origin-і үшін VAPID headers; мерзімі бітуге жақын болса қайта қол қояды"""
+        cached = self._vapid_cache.get(origin)
+        if cached is not None and cached[0] > time.time():
+            return cached[1]
+
+        async def sign():
+            vapid_claims = dict(claims)
+            vapid_claims["aud"] = origin
+            vapid_claims["exp"] = int(time.time()) + VAPID_EXPIRATION
+            headers = await asyncio.get_running_loop().run_in_executor(
+                None, vapid.sign, vapid_claims
+            )
+            self._vapid_cache[origin] = (vapid_claims["exp"] - VAPID_REFRESH_MARGIN, headers)
+            return headers
+
+        return await self._signing.do(origin, sign)
+
+    async def send(
+        self,
+        subscription_info: Dict[str, Any],
+        data: str,
+        vapid: Vapid,
+        claims: Dict[str, Any],
+    ) -> float:
+        """Бір хабарламаны жіберу; жіберу уақытын (мс) қайтарады"""
+        started = time.monotonic()
+        endpoint = subscription_info.get("endpoint")
+        keys_info = subscription_info.get("keys") or {}
+        keys_key = (endpoint, keys_info.get("p256dh"), keys_info.get("auth"))
+        try:
+            url = urlparse(endpoint)
+            headers = {
+                "Content-Encoding": PUSH_CONTENT_ENCODING,
+                "TTL": str(PUSH_TTL),
+                **await self._vapid_headers(f"{url.scheme}://{url.netloc}", vapid, claims),
+            }
+            body, keys = await asyncio.get_running_loop().run_in_executor(
+                None, self._encrypt, data.encode(), subscription_info, self._keys.get(keys_key)
+            )
+            self._keys.set(keys_key, keys)
+        except Exception as e:
+            self.failed += 1
+            raise PushSendError(f"Push preparation failed: {e}") from e
+        encrypted = time.monotonic()
+        self.encrypt_ms = self._ewma(self.encrypt_ms, (encrypted - started) * 1000)
+
+        session = await self.client.session()
+        try:
+            async with session.post(endpoint, data=body, headers=headers) as resp:
+                if resp.status > 202:
+                    text = await resp.text()
+                    self.failed += 1
+                    raise PushSendError(
+                        f"Push failed: {resp.status} {resp.reason}\nResponse body:{text}",
+                        status=resp.status,
+                    )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.failed += 1
+            raise PushSendError(f"Push delivery error: {e!r}") from e
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self.sent += 1
+        self.latency_ms = self._ewma(self.latency_ms, elapsed_ms)
+        if elapsed_ms > SLOW_PUSH_MS:
+            print(f"Slow push to {url.netloc}: {elapsed_ms:.0f} ms")
+        return elapsed_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "encrypt_ms": round(self.encrypt_ms, 1) if self.encrypt_ms is not None else None,
+        }
+
+
+push_sender = PushSender()
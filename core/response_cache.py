@@ -0,0 +1,185 @@
+"""
+API жауаптарының сервер жағындағы кэші - stale-while-revalidate және ETag/304
+"""
+
+import hashlib
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from aiohttp import web
+
+from utils.cache import SingleFlight, TTLCache
+from utils.json_response import dumps
+
+# Жаңа деп саналатын уақыт (секунд); одан кейін ескі жауап беріліп, фонда жаңартылады
+ATTESTATION_CACHE_TTL = int(os.environ.get("ATTESTATION_CACHE_TTL", 300))
+# Ескі жауапты беруге болатын ең ұзақ уақыт
+ATTESTATION_CACHE_MAX_STALE = int(os.environ.get("ATTESTATION_CACHE_MAX_STALE", 24 * 3600))
+# Транскрипт кэші upstream body хэшімен тексеріледі, сондықтан ұзақ сақтауға болады
+TRANSCRIPT_CACHE_TTL = int(os.environ.get("TRANSCRIPT_CACHE_TTL", 7 * 24 * 3600))
+
+
+def user_cache_key(univer_code: str, username: str) -> tuple:
+    return (univer_code, username)
+
+
+def credentials_owner(username: str, password: str) -> str:
+    """Кэш жазбасының иесі — credentials хэші (жалған _pc-мен бөтен кэшті оқуға болмайды)"""
+    return hashlib.sha256(f"{username}:{password}".encode()).hexdigest()
+
+
+class CachedResponse:
+    """Кэштегі бір жауап: деректер, дайын JSON bytes, ETag және Last-Modified"""
+
+    __slots__ = ("data", "body", "etag", "last_modified", "fetched_at", "owner")
+
+    def __init__(self, data: Any, body: bytes, etag: str, last_modified: float, owner: str):
+        self.data = data
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic()
+        self.owner = owner
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+def build_cached_response(
+    data: Any, owner: str, previous: Optional[CachedResponse] = None
+) -> CachedResponse:
+    body = dumps(data)
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    # Деректер өзгермесе Last-Modified сол күйі қалады
+    last_modified = (
+        previous.last_modified
+        if previous is not None and previous.etag == etag
+        else time.time()
+    )
+    return CachedResponse(data, body, etag, last_modified, owner)
+
+
+class ResponseCache:
+    """
+    Пайдаланушы бойынша кэш: user_key → {params → CachedResponse}.
+
+    ttl ішінде жауап жаңа; ttl өткеннен кейін max_stale-ге дейін ескі жауап
+    бірден беріледі де, фонда жаңартылады (stale-while-revalidate).
+    """
+
+    def __init__(self, ttl: float, max_stale: float, maxsize: int = 20000):
+        self.ttl = ttl
+        self._users = TTLCache(maxsize=maxsize, ttl=max_stale)
+        self._revalidating = SingleFlight()
+
+    def get(
+        self, user_key: Hashable, params: Hashable, owner: str
+    ) -> Tuple[Optional[CachedResponse], bool]:
+        """(жазба, жаңа ма) қайтарады; жазба жоқ болса (None, False)"""
+        entries: Optional[Dict[Hashable, CachedResponse]] = self._users.get(user_key)
+        if not entries:
+            return None, False
+        entry = entries.get(params)
+        if entry is None or entry.owner != owner:
+            return None, False
+        return entry, entry.age() < self.ttl
+
+    def put(self, user_key: Hashable, params: Hashable, owner: str, data: Any) -> CachedResponse:
+        entries = self._users.get(user_key)
+        if entries is None:
+            entries = {}
+        entry = build_cached_response(data, owner, entries.get(params))
+        entries[params] = entry
+        self._users.set(user_key, entries)
+        return entry
+
+    def invalidate_user(self, user_key: Hashable):
+        self._users.pop(user_key)
+
+    async def revalidate(self, user_key: Hashable, params: Hashable, fn):
+        """Бір кілт үшін бір уақытта тек бір фондық жаңарту"""
+        return await self._revalidating.do((user_key, params), fn)
+
+
+class TranscriptCacheEntry:
+    """Пайдаланушының транскрипті: upstream body хэші, дайын жауап және жабық семестрлер"""
+
+    __slots__ = ("source_hash", "response", "closed_terms")
+
+    def __init__(self, source_hash: str, response: CachedResponse, closed_terms: Dict[str, dict]):
+        self.source_hash = source_hash
+        self.response = response
+        # termGpaMap кілті ("курс_семестр") → дайын семестр; жабық семестр енді өзгермейді
+        self.closed_terms = closed_terms
+
+
+class TranscriptCache:
+    """
+    Өңделген транскрипт кэші. Upstream body хэші өзгермесе, түрлендіру
+    мүлдем орындалмайды; өзгерсе — тек ашық семестрлер қайта құрылады.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 20000):
+        self._users = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def source_hash(body: bytes) -> str:
+        return hashlib.sha1(body).hexdigest()
+
+    def get(self, user_key: Hashable, owner: str) -> Optional[TranscriptCacheEntry]:
+        entry: Optional[TranscriptCacheEntry] = self._users.get(user_key)
+        if entry is None or entry.response.owner != owner:
+            return None
+        return entry
+
+    def put(
+        self,
+        user_key: Hashable,
+        owner: str,
+        source_hash: str,
+        data: Any,
+        closed_terms: Dict[str, dict],
+    ) -> TranscriptCacheEntry:
+        previous = self.get(user_key, owner)
+        response = build_cached_response(
+            data, owner, previous.response if previous is not None else None
+        )
+        entry = TranscriptCacheEntry(source_hash, response, closed_terms)
+        self._users.set(user_key, entry)
+        return entry
+
+    def invalidate_user(self, user_key: Hashable):
+        self._users.pop(user_key)
+
+
+def cached_json_response(request: web.Request, entry: CachedResponse) -> web.Response:
+    """Кэш жазбасын ETag/Last-Modified-пен қайтару, сәйкес келсе — 304"""
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        # If-None-Match weak салыстыру: сығылған жауаптың W/ префиксі ескерілмейді
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if entry.etag in tags or "*" in tags:
+            return web.Response(status=304, headers=headers)
+    else:
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+                if int(entry.last_modified) <= since:
+                    return web.Response(status=304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+    return web.Response(
+        body=entry.body, content_type="application/json", charset="utf-8", headers=headers
+    )
+
+
+attestation_cache = ResponseCache(ATTESTATION_CACHE_TTL, ATTESTATION_CACHE_MAX_STALE)
+transcript_cache = TranscriptCache(TRANSCRIPT_CACHE_TTL)
@@ -0,0 +1,92 @@
+"""
+Таймер кезегі - кілт бойынша келесі орындалу уақыттары (heap), O(log n) жоспарлау және күту
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Ұзақ ұйқыны бөліп күтеміз — жүйе сағаты ауысса да кешікпейді
+TIMER_MAX_SLEEP = 300
+
+
+def next_occurrence(hhmm: str, now: Optional[datetime] = None, default: str = "22:00") -> float:
+    """"HH:MM" уақытының келесі басталуы (unix timestamp); қате мән болса default"""
+    now = now or datetime.now()
+    try:
+        hour, minute = map(int, hhmm.split(":"))
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except (AttributeError, ValueError):
+        hour, minute = map(int, default.split(":"))
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if now >= target:
+        target += timedelta(days=1)
+    return target.timestamp()
+
+
+class TimerHeap:
+    """
+    Әр кілттің бір келесі уақыты бар (time.time() бойынша). Қайта жоспарлау
+    және болдырмау O(log n): ескі heap жазбасы орнында қалып, pop кезінде
+    өткізіледі. wait_due() ең жақын уақытқа дейін ұйықтайды және жаңа
+    ертерек таймер қосылса оянады.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, Hashable]] = []
+        self._when: Dict[Hashable, float] = {}
+        self._changed = asyncio.Event()
+
+    def schedule(self, key: Hashable, when: float):
+        self._when[key] = when
+        heapq.heappush(self._heap, (when, key))
+        self._changed.set()
+
+    def cancel(self, key: Hashable):
+        self._when.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._when
+
+    def __len__(self) -> int:
+        return len(self._when)
+
+    def _drop_stale(self):
+        while self._heap and self._when.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        # Ескі жазбалар тым көбейсе heap-ті қайта құрамыз
+        if len(self._heap) > 2 * len(self._when) + 64:
+            self._heap = [(when, key) for key, when in self._when.items()]
+            heapq.heapify(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Hashable]:
+        """Уақыты келген кілттер (кезектен алынады)"""
+        now = time.time() if now is None else now
+        due = []
+        while True:
+            when = self.next_due()
+            if when is None or when > now:
+                return due
+            _, key = heapq.heappop(self._heap)
+            del self._when[key]
+            due.append(key)
+
+    async def wait_due(self) -> List[Hashable]:
+        """Кемінде бір таймер іске қосылғанша күту"""
+        while True:
+            self._changed.clear()
+            due = self.pop_due()
+            if due:
+                return due
+            when = self.next_due()
+            timeout = TIMER_MAX_SLEEP if when is None else min(when - time.time(), TIMER_MAX_SLEEP)
+            try:
+                await asyncio.wait_for(self._changed.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,56 @@
+"""
+Username → университет каталогы - автоматты анықтау режимін жылдамдату үшін
+"""
+
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+from database import data_path, get_database
+from utils.sqlite_storage import SqliteStorage
+from utils.write_behind import persistence
+
+# Базаға көшірілетін ескі каталог файлы
+UNIVER_DIRECTORY_FILE = data_path("univer_directory.json")
+
+
+class UniverDirectory:
+    """
+    Пайдаланушы атының хэшін соңғы рет қабылдаған университет кодымен
+    байланыстырады. Username ашық түрде сақталмайды.
+    """
+
+    def init(self):
+        """Кестені ашу және ескі JSON файлын көшіру (сервер қосылғанда бір рет)"""
+        # Хэш → университет коды; әр өзгеріс тек бір жолды жазады
+        self.entries = SqliteStorage(get_database(), "univer_directory", writer=persistence)
+        self.entries.migrate_json(UNIVER_DIRECTORY_FILE)
+
+    @staticmethod
+    def _hash(username: str) -> str:
+        return hashlib.sha256(f"univer:{username.strip()}".encode()).hexdigest()
+
+    def lookup(self, username: str) -> Optional[str]:
+        """Пайдаланушының белгілі университет кодын қайтару"""
+        if not username:
+            return None
+        return self.entries.get(self._hash(username))
+
+    def remember(self, username: str, univer_code: str):
+        """Сәтті логиннен кейін университетті есте сақтау"""
+        if not username or not univer_code:
+            return
+        key = self._hash(username)
+        if self.entries.get(key) != univer_code:
+            self.entries[key] = univer_code
+
+    def seed(self, pairs: Iterable[Tuple[str, str]]):
+        """Бар деректерден (мысалы push жазылулары) каталогты толтыру"""
+        for username, univer_code in pairs:
+            if not username or not univer_code:
+                continue
+            key = self._hash(username)
+            if key not in self.entries:
+                self.entries[key] = univer_code
+
+
+univer_directory = UniverDirectory()
@@ -1,8 +1,6 @@
 import re
 
-from utils.get_subject_translations import get_subject_translations
 from utils.fetch import fetch
-from utils.merge_attestation_attendance import merge_attestation_attendance
 from utils.storage import Storage
 from utils.logger import create_logger
 
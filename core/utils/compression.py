@@ -0,0 +1,100 @@
+"""
+HTTP жауаптарын сығу - JSON үшін gzip/brotli middleware
+"""
+
+import gzip
+from typing import Optional
+
+from aiohttp import web
+
+try:
+    import brotli
+except ImportError:  # brotli орнатылмаса тек gzip қолданылады
+    brotli = None
+
+# Осыдан кіші жауаптарды сығу тиімсіз (header + CPU артық)
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Static файлдар бір рет сығылады, сондықтан ең жоғары деңгей
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/manifest+json",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+COMPRESSIBLE_EXTENSIONS = (
+    ".js", ".css", ".html", ".json", ".svg", ".webmanifest", ".xml", ".txt",
+)
+
+
+def accepted_encoding(request: web.Request) -> Optional[str]:
+    """Accept-Encoding бойынша ең жақсы кодтау: br > gzip > жоқ"""
+    accept = request.headers.get("Accept-Encoding", "").lower()
+    offered = set()
+    for part in accept.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        offered.add(name.strip())
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL)
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+async def compression_middleware(app, handler):
+    """JSON және мәтін жауаптарын клиент қолдайтын кодтаумен сығу"""
+
+    async def middleware_handler(request):
+        response = await handler(request)
+
+        # FileResponse/stream өздігінен беріледі, тек дайын body-лі жауаптар сығылады
+        if type(response) is not web.Response or request.method == "HEAD":
+            return response
+        body = response.body
+        if (
+            not isinstance(body, bytes)
+            or len(body) < COMPRESS_MIN_SIZE
+            or "Content-Encoding" in response.headers
+            or not is_compressible(response.content_type)
+        ):
+            return response
+
+        if "Accept-Encoding" not in response.headers.get("Vary", ""):
+            response.headers.add("Vary", "Accept-Encoding")
+        encoding = accepted_encoding(request)
+        if encoding is None:
+            return response
+
+        response.body = compress(body, encoding)
+        response.headers["Content-Encoding"] = encoding
+        # Сығылған нұсқа байт бойынша басқа — strong ETag weak болады
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response.headers["ETag"] = "W/" + etag
+        return response
+
+    return middleware_handler
+
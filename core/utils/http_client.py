@@ -0,0 +1,72 @@
+import asyncio
+from typing import Dict, Optional
+
+import aiohttp
+
+
+class HttpClient:
+    """
+    Процесс бойы ортақ aiohttp.ClientSession.
+
+    Әр host-қа keep-alive connection pool, DNS кэш және host бойынша
+    байланыс лимиті бар. Cookie jar әдейі жоқ (DummyCookieJar) — cookies
+    пен headers әр сұранысқа бөлек беріледі, сондықтан бір пайдаланушының
+    сессиясы екіншісіне ағып кетпейді.
+
+    host_slot() — host бойынша limit_per_host орны. Оны алдын ала алған
+    сұраныс pool-да кезек күтпейді, сондықтан timeout тек host-тың өз
+    жауап беру уақытын өлшейді.
+    """
+
+    def __init__(
+        self,
+        timeout: aiohttp.ClientTimeout,
+        limit: int = 200,
+        limit_per_host: int = 20,
+        ttl_dns_cache: int = 300,
+        keepalive_timeout: float = 30,
+    ):
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def host_slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.limit_per_host)
+        return slot
+
+    async def start(self) -> aiohttp.ClientSession:
+        """Сессияны ашу (on_startup кезінде шақырылады)"""
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=self.timeout,
+                    cookie_jar=aiohttp.DummyCookieJar(),
+                )
+            return self._session
+
+    async def close(self):
+        """Сессияны жабу (on_cleanup кезінде шақырылады)"""
+        async with self._lock:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+            self._session = None
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Ашық сессияны қайтару; әлі ашылмаса — жалқау түрде ашу"""
+        if self._session is None or self._session.closed:
+            return await self.start()
+        return self._session
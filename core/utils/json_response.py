@@ -0,0 +1,62 @@
+"""
+JSON жауаптарын жылдам сериализациялау - orjson болса соны, болмаса stdlib json
+"""
+
+import json
+from collections import OrderedDict
+from typing import Any, Mapping, Optional
+
+from aiohttp import web
+
+try:
+    import orjson
+except ImportError:  # orjson орнатылмаған ортада stdlib-ке түсеміз
+    orjson = None
+
+# Өзгермейтін объектілердің (FAQ, университеттер тізімі) дайын bytes кэші
+ENCODED_CACHE_SIZE = 64
+
+_encoded: "OrderedDict[int, tuple[Any, bytes]]" = OrderedDict()
+
+
+def dumps(data: Any) -> bytes:
+    """Объектіні UTF-8 JSON bytes-ке айналдыру"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_cached(data: Any) -> bytes:
+    """
+    Бір объект қайта берілгенде дайын bytes қайтарады.
+    Кілт — id(data), сондықтан тек өзгертілмейтін объектілер үшін қолданыңыз;
+    объектінің өзі де сақталады, id қайта қолданылып кетпеуі үшін.
+    """
+    key = id(data)
+    item = _encoded.get(key)
+    if item is not None and item[0] is data:
+        _encoded.move_to_end(key)
+        return item[1]
+    body = dumps(data)
+    _encoded[key] = (data, body)
+    while len(_encoded) > ENCODED_CACHE_SIZE:
+        _encoded.popitem(last=False)
+    return body
+
+
+def json_response(
+    data: Any = None,
+    *,
+    status: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+    cache: bool = False,
+) -> web.Response:
+    """web.json_response орнына: bytes тікелей body-ге жазылады"""
+    body = dumps_cached(data) if cache else dumps(data)
+    return web.Response(
+        body=body,
+        status=status,
+        headers=headers,
+        content_type="application/json",
+        charset="utf-8",
+    )
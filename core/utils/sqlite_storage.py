@@ -0,0 +1,205 @@
+"""
+SQLite негізіндегі Storage - жол бойынша upsert, индекстелген бағандар және JSON-нан миграция
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.storage import Storage
+
+_MISSING = object()
+_DELETED = object()
+
+
+def open_database(path: str) -> sqlite3.Connection:
+    """WAL режиміндегі SQLite байланысы (оқу жазуды бөгемейді)"""
+    db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    # WAL-да NORMAL жеткілікті: crash кезінде соңғы транзакция ғана жоғалуы мүмкін
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA busy_timeout=5000")
+    return db
+
+
+class SqliteStorage(Storage):
+    """
+    Кілт → JSON мән кестесі. Әр жазу тек бір жолды upsert етеді.
+
+    indexed — мәннен есептелетін қосымша бағандар (атауы → функция),
+    олардың әрқайсысына индекс құрылады және find() арқылы сұралады.
+    cache=True болса барлық жолдар жадта да сақталады (оқу дискке бармайды);
+    қайтарылған мәнді өзгерткеннен кейін оны қайта жазу керек.
+    writer берілсе жазулар event loop-та емес, write-behind thread-інде орындалады.
+    """
+
+    def __init__(
+        self,
+        db: sqlite3.Connection,
+        table: str,
+        indexed: Optional[Dict[str, Callable[[Any], Any]]] = None,
+        cache: bool = True,
+        writer: Any = None,
+    ):
+        self.db = db
+        self.table = table
+        self.writer = writer
+        self.path = db.execute("PRAGMA database_list").fetchone()[2]
+        self.indexed = indexed or {}
+        self._columns = list(self.indexed)
+        self._cache: Optional[Dict[str, Any]] = None
+
+        extra = "".join(f", {name}" for name in self._columns)
+        db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL{extra})"
+        )
+        existing = {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+        for name in self._columns:
+            if name not in existing:
+                db.execute(f"ALTER TABLE {table} ADD COLUMN {name}")
+            db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{name} ON {table} ({name})")
+
+        placeholders = ", ".join("?" * (2 + len(self._columns)))
+        updates = "".join(f", {name} = excluded.{name}" for name in self._columns)
+        self._upsert_sql = (
+            f"INSERT INTO {table} (key, value{extra}) VALUES ({placeholders}) "
+            f"ON CONFLICT(key) DO UPDATE SET value = excluded.value{updates}"
+        )
+        self._delete_sql = f"DELETE FROM {table} WHERE key = ?"
+
+        if cache:
+            self._cache = {
+                key: json.loads(value)
+                for key, value in db.execute(f"SELECT key, value FROM {table}")
+            }
+
+    def _row(self, key: str, value: Any) -> Tuple:
+        columns = tuple(fn(value) for fn in self.indexed.values())
+        return (key, json.dumps(value, ensure_ascii=False)) + columns
+
+    def _execute(self, key: str, sql: str, params: Tuple, value: Any):
+        if self.writer is not None:
+            self.writer.execute(self.path, (self.table, key), sql, params, value)
+        else:
+            self.db.execute(sql, params)
+
+    def _pending(self, key: str) -> Any:
+        """write-behind кезегіндегі әлі жазылмаған мән"""
+        if self.writer is None:
+            return _MISSING
+        return self.writer.peek(self.path, (self.table, key), _MISSING)
+
+    def __setitem__(self, key: str, value: Any):
+        self._execute(key, self._upsert_sql, self._row(key, value), value)
+        if self._cache is not None:
+            self._cache[key] = value
+
+    def __getitem__(self, key: str) -> Any | None:
+        if self._cache is not None:
+            return self._cache.get(key)
+        value = self._pending(key)
+        if value is not _MISSING:
+            return None if value is _DELETED else value
+        row = self.db.execute(
+            f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, key: str) -> bool:
+        if self._cache is not None:
+            return key in self._cache
+        value = self._pending(key)
+        if value is not _MISSING:
+            return value is not _DELETED
+        row = self.db.execute(
+            f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def __delitem__(self, key: str):
+        self._execute(key, self._delete_sql, (key,), _DELETED)
+        if self._cache is not None:
+            self._cache.pop(key, None)
+
+    def __len__(self) -> int:
+        if self._cache is not None:
+            return len(self._cache)
+        return self.db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self[key]
+        return default if value is None else value
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Көшірме тізім — итерация кезінде жазуға болады"""
+        if self._cache is not None:
+            return list(self._cache.items())
+        return [
+            (key, json.loads(value))
+            for key, value in self.db.execute(f"SELECT key, value FROM {self.table}")
+        ]
+
+    def keys(self) -> List[str]:
+        return [key for key, _ in self.items()]
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self.items()]
+
+    def find(self, **conditions: Any) -> List[str]:
+        """Индекстелген бағандар бойынша кілттерді табу, мысалы find(univer_code="kstu")"""
+        unknown = set(conditions) - set(self._columns)
+        if unknown:
+            raise ValueError(f"Not an indexed column: {', '.join(sorted(unknown))}")
+        where = " AND ".join(f"{name} = ?" for name in conditions) or "1"
+        rows = self.db.execute(
+            f"SELECT key FROM {self.table} WHERE {where}", tuple(conditions.values())
+        )
+        keys = [row[0] for row in rows]
+        if self.writer is None:
+            return keys
+
+        # write-behind кезегіндегі жаңа/өзгерген/жойылған жолдар базадағыдан басым
+        pending = self.writer.pending_values(self.path, self.table)
+        if not pending:
+            return keys
+        result = [key for key in keys if key not in pending]
+        for key, value in pending.items():
+            if value is _DELETED or value is _MISSING:
+                continue
+            if all(self.indexed[name](value) == expected for name, expected in conditions.items()):
+                result.append(key)
+        return result
+
+    def update_many(self, items: Iterable[Tuple[str, Any]]):
+        """Көп жолды бір транзакцияда жазу"""
+        items = list(items)
+        self.db.execute("BEGIN")
+        try:
+            self.db.executemany(self._upsert_sql, [self._row(k, v) for k, v in items])
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        if self._cache is not None:
+            self._cache.update(items)
+
+    def migrate_json(self, path: str) -> int:
+        """
+        Ескі JSON файлынан бір реттік көшіру. Кесте бос болса ғана орындалады,
+        сәтті болса файл <path>.migrated болып қайта аталады.
+        """
+        if not os.path.exists(path) or len(self) > 0:
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error reading {path} for migration: {e}")
+            return 0
+        if not isinstance(data, dict):
+            return 0
+        self.update_many(data.items())
+        os.replace(path, path + ".migrated")
+        print(f"Migrated {len(data)} rows from {path} to {self.table}")
+        return len(data)
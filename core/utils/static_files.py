@@ -0,0 +1,172 @@
+"""
+Frontend static файлдарының жадтағы индексі - ETag, Cache-Control және сығылған нұсқалар
+"""
+
+import hashlib
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from utils.compression import (
+    COMPRESS_MIN_SIZE,
+    COMPRESSIBLE_EXTENSIONS,
+    accepted_encoding,
+    brotli,
+    compress,
+)
+
+# Осыдан үлкен файлдар жадта сақталмай, FileResponse арқылы беріледі
+STATIC_MEMORY_MAX_SIZE = 512 * 1024
+# Хэшпен аталған бандлдар (Vite) ешқашан өзгермейді
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# index.html, service worker және manifest әр жолы тексерілуі керек
+REVALIDATE_CACHE_CONTROL = "no-cache"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+IMMUTABLE_PREFIX = "assets/"
+REVALIDATE_FILES = {"index.html", "sw.js", "registerSW.js", "manifest.webmanifest"}
+
+
+class StaticFile:
+    """Индекстегі бір файл"""
+
+    __slots__ = (
+        "path", "content_type", "etag", "last_modified", "mtime", "cache_control", "body", "variants"
+    )
+
+    def __init__(self, path: str, content_type: str, etag: str, cache_control: str):
+        self.path = path
+        self.content_type = content_type
+        self.etag = etag
+        # Last-Modified header-і және If-Modified-Since салыстыруы үшін (секундпен)
+        self.mtime = 0
+        self.last_modified = ""
+        self.cache_control = cache_control
+        # Файл мазмұны (кішкентай файлдар үшін) және {"br"/"gzip": bytes}
+        self.body: Optional[bytes] = None
+        self.variants: Dict[str, bytes] = {}
+
+
+class StaticIndex:
+    """
+    CLIENT_DIR файлдарының индексі startup кезінде бір рет құрылады.
+    Сұраныс кезінде диск тексерілмейді: URL жолы тек индекс кілттерімен
+    салыстырылады, сондықтан "../" сияқты жолдар ешқашан табылмайды.
+    """
+
+    def __init__(self, root: str, fallback: str = "index.html"):
+        self.root = os.path.abspath(root)
+        self.fallback = fallback
+        self.files: Dict[str, StaticFile] = {}
+
+    @staticmethod
+    def _cache_control(rel_path: str) -> str:
+        if rel_path.startswith(IMMUTABLE_PREFIX):
+            return IMMUTABLE_CACHE_CONTROL
+        if rel_path in REVALIDATE_FILES:
+            return REVALIDATE_CACHE_CONTROL
+        return DEFAULT_CACHE_CONTROL
+
+    def _load(self, path: str, rel_path: str) -> Optional[StaticFile]:
+        content_type, _ = mimetypes.guess_type(path)
+        item = StaticFile(
+            path,
+            content_type or "application/octet-stream",
+            "",
+            self._cache_control(rel_path),
+        )
+        compressible = path.endswith(COMPRESSIBLE_EXTENSIONS)
+        try:
+            # Жадқа сыймайтын сығылмайтын файлды FileResponse өзі береді (ETag-пен)
+            if os.path.getsize(path) > STATIC_MEMORY_MAX_SIZE and not compressible:
+                return item
+            with open(path, "rb") as f:
+                body = f.read()
+            item.mtime = int(os.path.getmtime(path))
+            item.last_modified = formatdate(item.mtime, usegmt=True)
+        except OSError as e:
+            print(f"Error reading static file {path}: {e}")
+            return None
+        item.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if len(body) <= STATIC_MEMORY_MAX_SIZE:
+            item.body = body
+
+        # Сығылатын файлдар бір рет сығылады; дискте дайын көршісі болса соны оқимыз
+        if compressible and len(body) >= COMPRESS_MIN_SIZE:
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if os.path.isfile(path + suffix):
+                    with open(path + suffix, "rb") as f:
+                        item.variants[encoding] = f.read()
+                elif encoding != "br" or brotli is not None:
+                    data = compress(body, encoding, static=True)
+                    if len(data) < len(body):
+                        item.variants[encoding] = data
+        return item
+
+    def build(self):
+        files: Dict[str, StaticFile] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith((".br", ".gz")):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+                item = self._load(path, rel_path)
+                if item is not None:
+                    files[rel_path] = item
+        self.files = files
+        in_memory = sum(len(f.body) for f in files.values() if f.body is not None)
+        compressed = sum(len(v) for f in files.values() for v in f.variants.values())
+        print(
+            f"Static index: {len(files)} files, "
+            f"{in_memory // 1024} KB in memory, {compressed // 1024} KB compressed"
+        )
+
+    def lookup(self, rel_path: str) -> Optional[StaticFile]:
+        """URL жолы бойынша файл; табылмаса SPA үшін index.html"""
+        item = self.files.get(rel_path.lstrip("/"))
+        if item is None:
+            item = self.files.get(self.fallback)
+        return item
+
+    @staticmethod
+    def _not_modified_since(request: web.Request, item: StaticFile) -> bool:
+        """If-Modified-Since (If-None-Match жоқ болса ғана қолданылады)"""
+        value = request.headers.get("If-Modified-Since")
+        if not value:
+            return False
+        try:
+            return item.mtime <= parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def response(self, request: web.Request, item: StaticFile) -> web.StreamResponse:
+        headers = {"Cache-Control": item.cache_control, "Vary": "Accept-Encoding"}
+        encoding = accepted_encoding(request)
+        body = item.variants.get(encoding) if encoding else None
+        if body is None and item.body is None:
+            # Үлкен файл — дискіден тікелей (sendfile), ETag/304-ті FileResponse береді
+            return web.FileResponse(item.path, headers=headers)
+
+        etag = item.etag
+        if body is not None:
+            # Сығылған нұсқаның байттары басқа, сондықтан weak ETag
+            etag = "W/" + etag
+            headers["Content-Encoding"] = encoding
+        headers["ETag"] = etag
+        headers["Last-Modified"] = item.last_modified
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if item.etag in tags or "*" in tags:
+                return web.Response(status=304, headers=headers)
+        elif self._not_modified_since(request, item):
+            return web.Response(status=304, headers=headers)
+
+        if body is None:
+            body = item.body
+        return web.Response(body=body, content_type=item.content_type, headers=headers)
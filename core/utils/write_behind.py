@@ -0,0 +1,202 @@
+"""
+Write-behind сақтау - өзгерістер жадта белгіленіп, фондық thread-те топтап жазылады
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from utils.logger import get_default_logger
+from utils.sqlite_storage import open_database
+
+# Осы уақыт ішіндегі өзгерістер бір жазуға біріктіріледі (секунд)
+WRITE_BEHIND_DELAY = 0.5
+# Сәтсіз жазуды қайталау арасындағы ең ұзақ кідіріс (секунд)
+WRITE_BEHIND_MAX_BACKOFF = 30
+# Уақытша қатемен қайталанатын жазудың ең көп әрекет саны
+WRITE_BEHIND_MAX_ATTEMPTS = 8
+
+logger = get_default_logger("write_behind")
+
+
+class _Op:
+    __slots__ = ("target", "sql", "params", "value", "attempts")
+
+    def __init__(self, target: str, sql: str, params: Any, value: Any):
+        # target — SQLite базасының жолы
+        self.target = target
+        self.sql = sql
+        self.params = params
+        self.value = value
+        self.attempts = 0
+
+
+class WriteBehind:
+    """
+    Event loop тек кілт бойынша соңғы өзгерісті есте сақтайды; фондық thread
+    delay ішінде жиналған өзгерістерді әр база үшін бір транзакциямен жазады.
+    Бір кілттің бірнеше өзгерісінен тек соңғысы жазылады.
+
+    Транзакция сәтсіз болса өзгерістер бір-бірден жазылады — бір қате жол
+    басқаларын жоғалтпайды. Уақытша қатемен (database is locked, диск)
+    жазылмағандары кезекке қайтарылып, кідіріс өсе отырып қайталанады;
+    WRITE_BEHIND_MAX_ATTEMPTS әрекеттен кейін логқа жазылып тасталады.
+    """
+
+    def __init__(self, delay: float = WRITE_BEHIND_DELAY):
+        self.delay = delay
+        self._pending: "OrderedDict[Hashable, _Op]" = OrderedDict()
+        # Қазір жазылып жатқан өзгерістер (peek үшін)
+        self._inflight: Dict[Hashable, _Op] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._stopping = threading.Event()
+        self._backoff = 0.0
+        self._thread: Optional[threading.Thread] = None
+        # Thread-тің өз SQLite байланыстары (event loop байланысымен бөліспейміз)
+        self._connections: Dict[str, Any] = {}
+        atexit.register(self.flush)
+
+    def _enqueue(self, key: Hashable, op: _Op):
+        with self._lock:
+            # Соңғы өзгеріс кезектің соңына тұрады — ретті сақтау үшін
+            self._pending.pop(key, None)
+            self._pending[key] = op
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def execute(self, db_path: str, key: Hashable, sql: str, params: Tuple, value: Any = None):
+        """SQL жазуын кезекке қою; value — peek() қайтаратын жаңа мән"""
+        self._enqueue((db_path, key), _Op(db_path, sql, params, value))
+
+    def peek(self, db_path: str, key: Hashable, default: Any = None) -> Any:
+        """Әлі жазылмаған мән, кезекте жоқ болса default"""
+        with self._lock:
+            op = self._pending.get((db_path, key)) or self._inflight.get((db_path, key))
+        return default if op is None else op.value
+
+    def pending_values(self, db_path: str, table: str) -> Dict[str, Any]:
+        """Кестенің әлі жазылмаған мәндері: key → value (кілттері (table, key) түрінде)"""
+        result = {}
+        with self._lock:
+            # inflight ескірек — pending оның үстінен жазады
+            for source in (self._inflight, self._pending):
+                for (target, key), op in source.items():
+                    if target == db_path and isinstance(key, tuple) and len(key) == 2 and key[0] == table:
+                        result[key[1]] = op.value
+        return result
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait()
+            if self._stopped:
+                break
+            # Қатар келген өзгерістерді жинау терезесі
+            time.sleep(self.delay)
+            self._wakeup.clear()
+            if self.flush():
+                self._backoff = 0.0
+            else:
+                # Кезекке қайтқан өзгерістер — кідірістен кейін қайталау
+                self._backoff = min(max(self._backoff * 2, 1.0), WRITE_BEHIND_MAX_BACKOFF)
+                self._stopping.wait(self._backoff)
+                self._wakeup.set()
+
+    def flush(self) -> bool:
+        """Барлық күтудегі өзгерістерді қазір жазу; бәрі жазылса True"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                batch = self._pending
+                self._pending = OrderedDict()
+                self._inflight = dict(batch)
+            failed: "OrderedDict[Hashable, _Op]" = OrderedDict()
+            try:
+                self._write(batch, failed)
+            finally:
+                with self._lock:
+                    # Қайтарылғандар бастапқы ретімен кезектің басына тұрады;
+                    # жаңа өзгерісі бар кілттің ескі мәні қайтарылмайды
+                    if failed:
+                        self._pending = OrderedDict(
+                            [(key, op) for key, op in failed.items() if key not in self._pending]
+                            + list(self._pending.items())
+                        )
+                    self._inflight = {}
+            return not failed
+
+    def _write(self, batch: "OrderedDict[Hashable, _Op]", failed: "OrderedDict[Hashable, _Op]"):
+        by_db: Dict[str, list] = {}
+        for key, op in batch.items():
+            by_db.setdefault(op.target, []).append((key, op))
+
+        for db_path, ops in by_db.items():
+            try:
+                db = self._connections.get(db_path)
+                if db is None:
+                    db = self._connections[db_path] = open_database(db_path)
+                db.execute("BEGIN")
+                for _, op in ops:
+                    db.execute(op.sql, op.params)
+                db.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.warning(
+                    "Batch of %d changes to %s failed (%s), writing one by one", len(ops), db_path, e
+                )
+                if db_path in self._connections and self._connections[db_path].in_transaction:
+                    self._connections[db_path].execute("ROLLBACK")
+                self._write_each(db_path, ops, failed)
+
+    def _write_each(self, db_path: str, ops: list, failed: "OrderedDict[Hashable, _Op]"):
+        """Әр өзгерісті жеке жазу: уақытша қате — кезекке қайтады, басқасы логқа жазылады"""
+        db = self._connections.get(db_path)
+        for key, op in ops:
+            try:
+                if db is None:
+                    db = self._connections[db_path] = open_database(db_path)
+                db.execute(op.sql, op.params)
+            except sqlite3.OperationalError as e:
+                # "no such table" сияқты тұрақты қате де OperationalError — шексіз қайталамаймыз
+                op.attempts += 1
+                if op.attempts >= WRITE_BEHIND_MAX_ATTEMPTS:
+                    logger.error(
+                        "Dropping write to %s (%s) after %d attempts: %s",
+                        db_path, key, op.attempts, e,
+                    )
+                else:
+                    logger.warning("Write to %s deferred for retry (%s): %s", db_path, key, e)
+                    failed[key] = op
+            except sqlite3.Error as e:
+                logger.error("Dropping write to %s (%s): %s", db_path, key, e)
+
+    def stop(self):
+        """Қалғанын жазып, thread-ті тоқтату (on_cleanup)"""
+        self._stopped = True
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if not self.flush():
+            logger.error("%d changes could not be written before shutdown", len(self._pending))
+        for db in self._connections.values():
+            db.close()
+        self._connections = {}
+
+
+persistence = WriteBehind()
@@ -1,32 +1,70 @@
 from aiohttp import web
 from dataclasses import asdict
 import asyncio
+import hmac
 import json
 import os
 import socket
 import sys
 import base64
+from urllib.parse import urlparse
 
 # Core папкасын path-қа қосу (импорттар жұмыс істеуі үшін)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "core"))
 
+from academic_calendar import FALL_END, FALL_START, SPRING_END, SPRING_START
+from broadcast import broadcast_engine
 from push_notifications import push_service, scheduled_notifications
+from push_sender import push_sender
+from univer_directory import univer_directory
+from response_cache import (
+    attestation_cache,
+    cached_json_response,
+    credentials_owner,
+    transcript_cache,
+    user_cache_key,
+)
 from functions.platonus import (
     platonus_login,
+    platonus_login_auto,
+    platonus_refresh_login,
+    platonus_replacement_token,
+    platonus_get_person_id,
     platonus_get_student_info,
     platonus_get_attestation,
     platonus_get_subject_details,
-    platonus_get_transcript,
+    platonus_get_transcript_raw,
     platonus_get_umkd_list,
     platonus_get_umkd_files,
+    platonus_client,
+    PortalUnavailable,
+    probe_platonus_portal,
     UNIVERSITIES,
 )
+from functions.portal_health import portal_health
+from utils.compression import compression_middleware
+from utils.json_response import json_response
+from utils.static_files import StaticIndex
+from utils.write_behind import persistence
 
 # Frontend static папкасының жолы
 CLIENT_DIR = os.path.join(os.path.dirname(__file__), "static")
+# Static файлдардың жадтағы индексі (startup кезінде құрылады)
+static_index = StaticIndex(CLIENT_DIR)
 
 routes = web.RouteTableDef()
 
+# Жауапты күтпейтін фондық тапсырмалар — сілтемесіз task-ты GC жойып жіберуі мүмкін
+background_tasks: set[asyncio.Task] = set()
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """Тапсырманы фонда бастау; біткенше background_tasks-та сақталады"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
 DEFAULT_PORT = 7435
 FALLBACK_PORT_START = 7436
 FALLBACK_PORT_END = 7499
@@ -96,19 +134,22 @@ def decode_credentials(encoded: str) -> tuple[str, str] | None:
     return None
 
 
+# Университеттер тізімі өзгермейді — бір рет құрылып, JSON bytes кэштеледі
+UNIVERSITY_LIST = [
+    {
+        "code":    code,
+        "name":    info["name"],
+        "logo":    info["logo"],
+        "website": info["website"],
+    }
+    for code, info in UNIVERSITIES.items()
+]
+
+
 # Университеттер тізімі — публичный эндпоинт (авторизация қажет емес)
 @routes.get("/api/universities")
 async def get_universities(request):
-    result = [
-        {
-            "code":    code,
-            "name":    info["name"],
-            "logo":    info["logo"],
-            "website": info["website"],
-        }
-        for code, info in UNIVERSITIES.items()
-    ]
-    return web.json_response(result)
+    return json_response(UNIVERSITY_LIST, cache=True)
 
 
 # Login handler
@@ -121,25 +162,25 @@ async def login(request):
 
     try:
         if univer_code == "auto":
-            codes = list(UNIVERSITIES.keys())
-            tasks = [platonus_login(username, password, code) for code in codes]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            successful_idx = -1
-            for idx, pt_token in enumerate(results):
-                if pt_token and not isinstance(pt_token, Exception):
-                    successful_idx = idx
-                    break
-            
-            if successful_idx == -1:
-                return web.json_response({"error": "Platonus login failed"}, status=401)
-                
-            pt_token = results[successful_idx]
-            univer_code = codes[successful_idx]
+            # Таныс пайдаланушы болса — соңғы рет қабылдаған портал алдымен басталады.
+            # Бірінші қабылдаған портал жеңеді, қалғандары тоқтатылады
+            known_code = univer_directory.lookup(username)
+            found = await platonus_login_auto(username, password, preferred=known_code)
+            # Таныс портал қолжетімсіз болса — пароль қате деп айтпаймыз
+            if not found and known_code and not portal_health.is_available(known_code):
+                return _portal_unavailable()
+            if not found:
+                return json_response({"error": "Platonus login failed"}, status=401)
+            univer_code, pt_token = found
         else:
             pt_token = await platonus_login(username, password, univer_code)
             if not pt_token:
-                return web.json_response({"error": "Platonus login failed"}, status=401)
+                return json_response({"error": "Platonus login failed"}, status=401)
+
+        univer_directory.remember(username, univer_code)
+
+        # personID-ді алдын ала кэшке жүктеу — бағалар беті бір round trip-пен ашылады
+        run_in_background(platonus_get_person_id(pt_token))
 
         # Университет мета-деректері — фронтендке жіберіледі
         univer_info = UNIVERSITIES.get(univer_code, {})
@@ -152,7 +193,7 @@ async def login(request):
                 "website": univer_info.get("website", ""),
             },
         }
-        response = web.json_response(response_body)
+        response = json_response(response_body)
 
         # Platonus session cookies
         response.set_cookie("_pt", pt_token, httponly=True, max_age=3600 * 24 * 30)
@@ -162,8 +203,10 @@ async def login(request):
         response.set_cookie("univer_code", univer_code, max_age=3600 * 24 * 30)
 
         return response
+    except PortalUnavailable:
+        return _portal_unavailable()
     except Exception as e:
-        return web.json_response({"error": str(e)}, status=401)
+        return json_response({"error": str(e)}, status=401)
 
 
 # CORS middleware - Локальді әзірлеу кезінде CORS қателіктерінің алдын алу
@@ -194,20 +237,28 @@ async def platonus_middleware(app, handler):
             pt = request.cookies.get("_pt")
             pc = request.cookies.get("_pc")
 
+            # Токенді сервер басқа сұраныс кезінде жаңартып қойған болса — соны қолданамыз
+            if pt and pc:
+                creds = decode_credentials(pc)
+                if creds:
+                    univer_code = request.cookies.get("univer_code", "kstu")
+                    fresh_pt = platonus_replacement_token(pt, *creds, univer_code)
+                    if fresh_pt:
+                        pt = fresh_pt
+                        request["new_pt"] = pt
+
             # Егер Platonus токені жоқ болса, бірақ credentials бар болса - қайта кіру
             if not pt and pc:
+                univer_code = request.cookies.get("univer_code", "kstu")
                 try:
-                    decoded = base64.b64decode(pc).decode()
-                    username, password = decoded.split(":", 1)
-                    univer_code = request.cookies.get("univer_code", "kstu")
-                    pt = await platonus_login(username, password, univer_code)
-                    if pt:
-                        request["new_pt"] = pt
-                except Exception:
-                    pass
+                    pt = await _platonus_refresh_token(pc, univer_code)
+                except PortalUnavailable:
+                    return _portal_unavailable()
+                if pt:
+                    request["new_pt"] = pt
 
             if not pt:
-                return web.json_response(
+                return json_response(
                     {"error": "unauthorized", "message": "Авторизация қажет"},
                     status=401,
                 )
@@ -226,19 +277,18 @@ async def platonus_middleware(app, handler):
     return middleware_handler
 
 
+def _portal_unavailable():
+    """Порталдың circuit-і ашық — сессия ескірген жоқ, клиент кейінірек қайталайды"""
+    return json_response({"error": "portal_unavailable"}, status=503)
+
 
 def calculate_academic_week():
     from datetime import date
     today_date = date.today()
     
-    # 2025-2026 Academic Year
-    # Fall 2025
-    fall_start = date(2025, 9, 1)
-    fall_end = date(2025, 12, 13)
-    
-    # Spring 2026
-    spring_start = date(2026, 1, 26)
-    spring_end = date(2026, 4, 4)
+    # 2025-2026 Academic Year (даталар academic_calendar-да)
+    fall_start, fall_end = FALL_START, FALL_END
+    spring_start, spring_end = SPRING_START, SPRING_END
     
     # Check Fall 2025
     if fall_start <= today_date <= fall_end:
@@ -304,7 +354,7 @@ def calculate_academic_week():
 @routes.get("/api/schedule")
 async def get_schedule(request):
     week_info = calculate_academic_week()
-    return web.json_response({
+    return json_response({
         "lessons": [],
         "factor": None,
         "week": week_info.get("week", 1),
@@ -314,123 +364,195 @@ async def get_schedule(request):
     })
 
 
+def _transcript_term_order(gpa_key: str) -> tuple:
+    """termGpaMap кілтін ("курс_семестр") хронологиялық ретке келтіру"""
+    course, _, term = gpa_key.partition("_")
+    term_num = int(term)
+    return (int(course), term_num < 0, abs(term_num))
+
+
+def _closed_transcript_terms(term_gpa_map: dict) -> set:
+    """
+    Жабық семестрлер: GPA қойылған барлық семестр, ең соңғысынан басқа
+    (ағымдағы семестрдің бағалары әлі түзетілуі мүмкін).
+    """
+    graded = []
+    for gpa_key, gpa in term_gpa_map.items():
+        try:
+            order = _transcript_term_order(gpa_key)
+        except ValueError:
+            continue
+        if gpa:
+            graded.append((order, gpa_key))
+    graded.sort()
+    return {gpa_key for _, gpa_key in graded[:-1]}
+
+
+def _build_transcript_data(res: dict, closed_terms: dict) -> tuple[dict, dict]:
+    """
+    Platonus транскриптін фронтенд форматына түрлендіру.
+
+    closed_terms — бұрын құрылған жабық семестрлер; олар қайта құрылмайды.
+    (transcript_data, жаңартылған closed_terms) қайтарады.
+    """
+    student = res.get("student") or {}
+    
+    # Extract localized fields
+    study_lang = student.get("studyLanguageNameKz") or student.get("studyLanguageName") or "қазақ"
+    fullname = student.get("fullName") or student.get("personName") or "Студент"
+    faculty = student.get("facultyNameKz") or student.get("faculty_name") or "Факультет"
+    degree = student.get("professionDegreeKZ") or student.get("professionDegree") or student.get("degreeNameKz") or student.get("degreeName") or "Бакалавр"
+    program = student.get("specializationNameKz") or student.get("specializationName") or "Білім беру бағдарламасы"
+    group = student.get("onlyProfessionNameKz") or student.get("professionName") or "Мамандық тобы"
+    
+    # Try to parse real semesters dynamically from the Platonus response if available
+    semesters_data = []
+    course_data = res.get("courseData") or {}
+    term_gpa_map = res.get("termGpaMap") or {}
+    closed_keys = _closed_transcript_terms(term_gpa_map)
+    reusable = {k: v for k, v in closed_terms.items() if k in closed_keys}
+    new_closed_terms = {}
+    
+    if isinstance(course_data, dict) and len(course_data) > 0:
+        course_keys = sorted([k for k in course_data.keys() if k.isdigit()], key=int)
+        for c_key in course_keys:
+            courses_list = course_data[c_key].get("courses") or []
+            if not courses_list:
+                continue
+            
+            term_subjects = {}
+            for c in courses_list:
+                term = c.get("term") or 1
+                if term not in term_subjects:
+                    term_subjects[term] = []
+
+                # Жабық семестр бұрын құрылған — пәндерін қайта өңдемейміз
+                if f"{c_key}_{term}" in reusable:
+                    continue
+                
+                subj_name = c.get("courseNameKZ") or c.get("courseNameRU") or c.get("courseNameEN") or "Белгісіз пән"
+                percent = float(c.get("percentMark") or 0.0)
+                points = float(c.get("markInPoints") or 0.0)
+                
+                term_subjects[term].append({
+                    "name": subj_name,
+                    "percent": percent,
+                    "points": points
+                })
+            
+            sorted_terms = sorted(term_subjects.keys(), key=int)
+            for term in sorted_terms:
+                gpa_key = f"{c_key}_{term}"
+                if gpa_key in reusable:
+                    semester = new_closed_terms[gpa_key] = reusable[gpa_key]
+                    semesters_data.append(semester)
+                    continue
+
+                subjects = term_subjects[term]
+                
+                formatted_subjects = []
+                for idx, sub in enumerate(subjects, 1):
+                    formatted_subjects.append({
+                        "number": idx,
+                        "name": sub["name"],
+                        "percent": sub["percent"],
+                        "points": sub["points"]
+                    })
+                
+                term_gpa = term_gpa_map.get(gpa_key) or 0.0
+                
+                if term_gpa == 0.0:
+                    total_pts = sum(s["points"] for s in subjects)
+                    term_gpa = round(total_pts / len(subjects), 2) if subjects else 0.0
+                
+                term_name = f"Академиялық кезең {term}" if c_key == "1" else f"{c_key} Курс • Академиялық кезең {term}"
+                semester = {
+                    "name": term_name,
+                    "gpa": term_gpa,
+                    "subjects": formatted_subjects
+                }
+                if gpa_key in closed_keys:
+                    new_closed_terms[gpa_key] = semester
+                semesters_data.append(semester)
+    
+
+    transcript_data = {
+        "fullname": fullname,
+        "faculty": faculty,
+        "level_of_the_qualification": degree,
+        "level_of_education": "Жоғары",
+        "education_program": program,
+        "education_program_group": group,
+        "language": study_lang,
+        "year_of_study": student.get("courseNumber") or 4,
+        "length_of_program": float(student.get("courseCount") or 4.0),
+        "graid_point": student.get("GPA") or 2.87,
+        "avarage_point": student.get("averageMark") or 75.0,
+        "form_of_study": student.get("studyFormNameKz") or student.get("studyFormName") or "күндізгі",
+        "semesters": semesters_data,
+        "overall_gpa": student.get("GPA") or 2.87,
+        "min_gpa": 1.0
+    }
+    return transcript_data, new_closed_terms
+
+
 @routes.get("/api/transcript")
 async def get_transcript(request):
     pt_token = request.get("pt_token")
     if not pt_token:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     try:
-        res = await platonus_get_transcript(pt_token)
-        if res is None:
+        body = await platonus_get_transcript_raw(pt_token)
+        if body is None:
             # Token might be expired, try refreshing using _pc
             pc_cookie = request.cookies.get("_pc")
             if pc_cookie:
                 univer_code = request.cookies.get("univer_code", "kstu")
-                pt_token = await _platonus_refresh_token(pc_cookie, univer_code)
+                pt_token = await _platonus_refresh_token(pc_cookie, univer_code, pt_token)
                 if pt_token:
-                    res = await platonus_get_transcript(pt_token)
+                    body = await platonus_get_transcript_raw(pt_token)
 
-        if not res:
-            return web.json_response({"error": "Failed to load transcript from Platonus"}, status=400)
+        if not body:
+            return json_response({"error": "Failed to load transcript from Platonus"}, status=400)
 
-        student = res.get("student") or {}
-        
-        # Extract localized fields
-        study_lang = student.get("studyLanguageNameKz") or student.get("studyLanguageName") or "қазақ"
-        fullname = student.get("fullName") or student.get("personName") or "Студент"
-        faculty = student.get("facultyNameKz") or student.get("faculty_name") or "Факультет"
-        degree = student.get("professionDegreeKZ") or student.get("professionDegree") or student.get("degreeNameKz") or student.get("degreeName") or "Бакалавр"
-        program = student.get("specializationNameKz") or student.get("specializationName") or "Білім беру бағдарламасы"
-        group = student.get("onlyProfessionNameKz") or student.get("professionName") or "Мамандық тобы"
-        
-        # Try to parse real semesters dynamically from the Platonus response if available
-        semesters_data = []
-        course_data = res.get("courseData") or {}
-        term_gpa_map = res.get("termGpaMap") or {}
-        
-        if isinstance(course_data, dict) and len(course_data) > 0:
-            course_keys = sorted([k for k in course_data.keys() if k.isdigit()], key=int)
-            for c_key in course_keys:
-                courses_list = course_data[c_key].get("courses") or []
-                if not courses_list:
-                    continue
-                
-                term_subjects = {}
-                for c in courses_list:
-                    term = c.get("term") or 1
-                    if term not in term_subjects:
-                        term_subjects[term] = []
-                    
-                    subj_name = c.get("courseNameKZ") or c.get("courseNameRU") or c.get("courseNameEN") or "Белгісіз пән"
-                    percent = float(c.get("percentMark") or 0.0)
-                    points = float(c.get("markInPoints") or 0.0)
-                    
-                    term_subjects[term].append({
-                        "name": subj_name,
-                        "percent": percent,
-                        "points": points
-                    })
-                
-                sorted_terms = sorted(term_subjects.keys(), key=int)
-                for term in sorted_terms:
-                    subjects = term_subjects[term]
-                    
-                    formatted_subjects = []
-                    for idx, sub in enumerate(subjects, 1):
-                        formatted_subjects.append({
-                            "number": idx,
-                            "name": sub["name"],
-                            "percent": sub["percent"],
-                            "points": sub["points"]
-                        })
-                    
-                    gpa_key = f"{c_key}_{term}"
-                    term_gpa = term_gpa_map.get(gpa_key) or 0.0
-                    
-                    if term_gpa == 0.0:
-                        total_pts = sum(s["points"] for s in subjects)
-                        term_gpa = round(total_pts / len(subjects), 2) if subjects else 0.0
-                    
-                    term_name = f"Академиялық кезең {term}" if c_key == "1" else f"{c_key} Курс • Академиялық кезең {term}"
-                    semesters_data.append({
-                        "name": term_name,
-                        "gpa": term_gpa,
-                        "subjects": formatted_subjects
-                    })
-        
+        # Upstream жауабы өзгермесе — түрлендірусіз кэштен береміз
+        identity = _cache_identity(request)
+        source_hash = transcript_cache.source_hash(body)
+        cached = transcript_cache.get(*identity) if identity else None
+        if cached is not None and cached.source_hash == source_hash:
+            resp = cached_json_response(request, cached.response)
+        else:
+            try:
+                res = json.loads(body)
+            except ValueError:
+                # JSON емес жауап (мысалы HTML қате беті)
+                res = None
+            if not res:
+                return json_response({"error": "Failed to load transcript from Platonus"}, status=400)
+
+            closed_terms = cached.closed_terms if cached is not None else {}
+            transcript_data, closed_terms = _build_transcript_data(res, closed_terms)
+            if identity:
+                entry = transcript_cache.put(*identity, source_hash, transcript_data, closed_terms)
+                resp = cached_json_response(request, entry.response)
+            else:
+                resp = json_response(transcript_data)
 
-        transcript_data = {
-            "fullname": fullname,
-            "faculty": faculty,
-            "level_of_the_qualification": degree,
-            "level_of_education": "Жоғары",
-            "education_program": program,
-            "education_program_group": group,
-            "language": study_lang,
-            "year_of_study": student.get("courseNumber") or 4,
-            "length_of_program": float(student.get("courseCount") or 4.0),
-            "graid_point": student.get("GPA") or 2.87,
-            "avarage_point": student.get("averageMark") or 75.0,
-            "form_of_study": student.get("studyFormNameKz") or student.get("studyFormName") or "күндізгі",
-            "semesters": semesters_data,
-            "overall_gpa": student.get("GPA") or 2.87,
-            "min_gpa": 1.0
-        }
-        
-        resp = web.json_response(transcript_data)
         if "new_pt" not in request and pt_token != request.cookies.get("_pt"):
             resp.set_cookie("_pt", pt_token, httponly=True, max_age=3600 * 24 * 30)
         return resp
+    except PortalUnavailable:
+        return _portal_unavailable()
     except Exception as e:
-        return web.json_response({"error": str(e)}, status=500)
+        return json_response({"error": str(e)}, status=500)
 
 
 @routes.get("/api/attestation")
 async def get_attestation(request):
     pt_token = request.get("pt_token")
     if not pt_token:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     from datetime import date
     today = date.today()
@@ -444,37 +566,111 @@ async def get_attestation(request):
         except ValueError:
             pass
 
+    pc_cookie = request.cookies.get("_pc")
+    univer_code = request.cookies.get("univer_code", "kstu")
+    params = (year, semester)
+
     try:
-        data = await platonus_get_attestation(pt_token, year, semester)
-        if data is None:
-            # Token might be expired, try refreshing using _pc
-            pc_cookie = request.cookies.get("_pc")
-            if pc_cookie:
-                univer_code = request.cookies.get("univer_code", "kstu")
-                pt_token = await _platonus_refresh_token(pc_cookie, univer_code)
-                if pt_token:
-                    data = await platonus_get_attestation(pt_token, year, semester)
+        # Кэш: жаңа болса бірден, ескі болса бірден беріп фонда жаңартамыз
+        identity = _cache_identity(request)
+        if identity:
+            user_key, owner = identity
+            entry, fresh = attestation_cache.get(user_key, params, owner)
+            if entry is not None:
+                if not fresh:
+                    run_in_background(
+                        attestation_cache.revalidate(
+                            user_key,
+                            params,
+                            lambda: _refresh_attestation_cache(
+                                identity, pt_token, pc_cookie, univer_code, year, semester
+                            ),
+                        )
+                    )
+                return cached_json_response(request, entry)
+
+        data, pt_token = await _load_attestation(pt_token, pc_cookie, univer_code, year, semester)
 
         if data is None:
-            return web.json_response({"error": "session_expired"}, status=401)
+            return json_response({"error": "session_expired"}, status=401)
 
-        resp = web.json_response(data)
+        if identity and data:
+            entry = attestation_cache.put(identity[0], params, identity[1], data)
+            resp = cached_json_response(request, entry)
+        else:
+            resp = json_response(data)
         if "new_pt" not in request and pt_token != request.cookies.get("_pt"):
             resp.set_cookie("_pt", pt_token, httponly=True, max_age=3600 * 24 * 30)
             resp.set_cookie(".ASPXAUTH", pt_token, httponly=True, max_age=3600 * 24 * 30)
         return resp
+    except PortalUnavailable:
+        return _portal_unavailable()
     except Exception as e:
-        return web.json_response({"error": str(e)}, status=500)
+        return json_response({"error": str(e)}, status=500)
 
 
-async def _platonus_refresh_token(pc_cookie: str | None, univer_code: str = "kstu") -> str | None:
-    """Refresh Platonus token using stored credentials (_pc cookie)."""
+def _cache_identity(request) -> tuple[tuple, str] | None:
+    """Сервер кэші үшін (пайдаланушы кілті, иесі) — тек _pc cookie болса"""
+    creds = decode_credentials(request.cookies.get("_pc") or "")
+    if not creds:
+        return None
+    username, password = creds
+    univer_code = request.cookies.get("univer_code", "kstu")
+    return user_cache_key(univer_code, username), credentials_owner(username, password)
+
+
+async def _load_attestation(
+    pt_token: str, pc_cookie: str | None, univer_code: str, year: int, semester: int
+) -> tuple[list | None, str | None]:
+    """Platonus-тан бағаларды алу; токен ескірсе — бір рет жаңартып қайталау"""
+    data = await platonus_get_attestation(pt_token, year, semester)
+    if data is None and pc_cookie:
+        # Token might be expired, try refreshing using _pc
+        pt_token = await _platonus_refresh_token(pc_cookie, univer_code, pt_token)
+        if pt_token:
+            data = await platonus_get_attestation(pt_token, year, semester)
+    return data, pt_token
+
+
+async def _refresh_attestation_cache(
+    identity: tuple[tuple, str],
+    pt_token: str,
+    pc_cookie: str | None,
+    univer_code: str,
+    year: int,
+    semester: int,
+):
+    """Ескі кэш жазбасын фонда жаңарту (stale-while-revalidate)"""
+    try:
+        data, _ = await _load_attestation(pt_token, pc_cookie, univer_code, year, semester)
+        if data:
+            attestation_cache.put(identity[0], (year, semester), identity[1], data)
+    except PortalUnavailable:
+        # Ескі жазба қала береді — портал қалпына келгенде қайта жаңартылады
+        pass
+    except Exception as e:
+        print(f"Attestation revalidate error: {e}")
+
+
+async def _platonus_refresh_token(
+    pc_cookie: str | None, univer_code: str = "kstu", stale_pt: str | None = None
+) -> str | None:
+    """Refresh Platonus token using stored credentials (_pc cookie).
+
+    Concurrent refreshes for the same account share one login, and the new
+    token is remembered server-side for requests still carrying stale_pt.
+    """
     if not pc_cookie:
         return None
+    # Портал қолжетімсіз — логин де сәтсіз болады; бұл сессияның ескіргені емес
+    if not portal_health.is_available(univer_code):
+        raise PortalUnavailable(univer_code)
     try:
         decoded = base64.b64decode(pc_cookie).decode()
         u, p = decoded.split(":", 1)
-        return await platonus_login(u, p, univer_code)
+        return await platonus_refresh_login(u, p, univer_code, stale_pt)
+    except PortalUnavailable:
+        raise
     except Exception:
         return None
 
@@ -492,7 +688,7 @@ async def _get_pt_cookie(request) -> str | None:
 async def get_subject_details(request):
     pt_token = request.get("pt_token")
     if not pt_token:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     from datetime import date
     today = date.today()
@@ -510,7 +706,7 @@ async def get_subject_details(request):
     query_id = request.query.get("query_id")
 
     if not subject_id or not query_id:
-        return web.json_response(
+        return json_response(
             {"error": "Missing subject_id or query_id"}, status=400
         )
 
@@ -523,26 +719,28 @@ async def get_subject_details(request):
             pc_cookie = request.cookies.get("_pc")
             if pc_cookie:
                 univer_code = request.cookies.get("univer_code", "kstu")
-                pt_token = await _platonus_refresh_token(pc_cookie, univer_code)
+                pt_token = await _platonus_refresh_token(pc_cookie, univer_code, pt_token)
                 if pt_token:
                     data = await platonus_get_subject_details(
                         pt_token, int(year), int(semester), int(subject_id), int(query_id)
                     )
 
         if data is None:
-            return web.json_response({"error": "session_expired"}, status=401)
+            return json_response({"error": "session_expired"}, status=401)
 
-        resp = web.json_response(data)
+        resp = json_response(data)
         if "new_pt" not in request and pt_token != request.cookies.get("_pt"):
             resp.set_cookie("_pt", pt_token, httponly=True, max_age=3600 * 24 * 30)
         return resp
+    except PortalUnavailable:
+        return _portal_unavailable()
     except Exception as e:
-        return web.json_response({"error": str(e)}, status=500)
+        return json_response({"error": str(e)}, status=500)
 
 
 @routes.get("/api/exams")
 async def get_exams(request):
-    return web.json_response([])
+    return json_response([])
 
 
 @routes.post("/api/push/subscribe")
@@ -553,14 +751,15 @@ async def push_subscribe(request):
     lang = request.query.get("lang", "kk")
 
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     # Username-ді user_id ретінде қолдану
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
+    univer_directory.remember(username, univer_code)
 
     push_service.subscribe(
         user_id=username,
@@ -570,23 +769,23 @@ async def push_subscribe(request):
         language=lang,
     )
 
-    return web.json_response({"status": "ok"})
+    return json_response({"status": "ok"})
 
 
 @routes.post("/api/push/unsubscribe")
 async def push_unsubscribe(request):
     encoded_creds = request.cookies.get("_pc")  # Cookie-ден оқу
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     push_service.unsubscribe(username)
 
-    return web.json_response({"status": "ok"})
+    return json_response({"status": "ok"})
 
 
 @routes.get("/api/push/status")
@@ -594,17 +793,17 @@ async def push_status(request):
     """Пайдаланушының жазылу статусын тексеру"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"subscribed": False})
+        return json_response({"subscribed": False})
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"subscribed": False})
+        return json_response({"subscribed": False})
 
     username, _ = creds
     is_subscribed = push_service.is_subscribed(username)
     settings = push_service.get_settings(username) if is_subscribed else None
 
-    return web.json_response({"subscribed": is_subscribed, "settings": settings})
+    return json_response({"subscribed": is_subscribed, "settings": settings})
 
 
 @routes.post("/api/push/settings")
@@ -612,11 +811,11 @@ async def push_update_settings(request):
     """Хабарлама параметрлерін жаңарту"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     data = await request.json()
@@ -624,9 +823,9 @@ async def push_update_settings(request):
 
     success = push_service.update_settings(username, settings)
     if success:
-        return web.json_response({"status": "ok", "settings": settings})
+        return json_response({"status": "ok", "settings": settings})
     else:
-        return web.json_response({"error": "not_subscribed"}, status=404)
+        return json_response({"error": "not_subscribed"}, status=404)
 
 
 @routes.post("/api/push/test")
@@ -634,11 +833,11 @@ async def push_test(request):
     """Тестілік хабарлама жіберу"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
 
@@ -668,9 +867,9 @@ async def push_test(request):
     )
 
     if success:
-        return web.json_response({"status": "ok"})
+        return json_response({"status": "ok"})
     else:
-        return web.json_response({"error": "not_subscribed"}, status=404)
+        return json_response({"error": "not_subscribed"}, status=404)
 
 
 @routes.get("/api/push/history")
@@ -678,18 +877,18 @@ async def push_get_history(request):
     """Хабарлама тарихын алу"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     limit = int(request.query.get("limit", 50))
     offset = int(request.query.get("offset", 0))
 
     history = push_service.get_notification_history(username, limit, offset)
-    return web.json_response({"history": history, "count": len(history)})
+    return json_response({"history": history, "count": len(history)})
 
 
 @routes.post("/api/push/history/{notification_id}/mark-read")
@@ -697,20 +896,20 @@ async def push_mark_read(request):
     """Хабарламаны оқылған деп белгілеу"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     notification_id = request.match_info["notification_id"]
 
     success = push_service.mark_notification_read(username, notification_id)
     if success:
-        return web.json_response({"status": "ok"})
+        return json_response({"status": "ok"})
     else:
-        return web.json_response({"error": "not_found"}, status=404)
+        return json_response({"error": "not_found"}, status=404)
 
 
 @routes.post("/api/push/history/{notification_id}/mark-clicked")
@@ -718,20 +917,20 @@ async def push_mark_clicked(request):
     """Хабарламаны басылған деп белгілеу"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     notification_id = request.match_info["notification_id"]
 
     success = push_service.mark_notification_clicked(username, notification_id)
     if success:
-        return web.json_response({"status": "ok"})
+        return json_response({"status": "ok"})
     else:
-        return web.json_response({"error": "not_found"}, status=404)
+        return json_response({"error": "not_found"}, status=404)
 
 
 @routes.delete("/api/push/history/{notification_id}")
@@ -739,20 +938,20 @@ async def push_delete_notification(request):
     """Хабарламаны жою"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     notification_id = request.match_info["notification_id"]
 
     success = push_service.delete_notification(username, notification_id)
     if success:
-        return web.json_response({"status": "ok"})
+        return json_response({"status": "ok"})
     else:
-        return web.json_response({"error": "not_found"}, status=404)
+        return json_response({"error": "not_found"}, status=404)
 
 
 @routes.delete("/api/push/history")
@@ -760,15 +959,15 @@ async def push_clear_history(request):
     """Барлық хабарлама тарихын тазалау"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     push_service.clear_notification_history(username)
-    return web.json_response({"status": "ok"})
+    return json_response({"status": "ok"})
 
 
 @routes.get("/api/push/stats")
@@ -776,15 +975,15 @@ async def push_get_stats(request):
     """Хабарлама статистикасын алу"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     stats = push_service.get_notification_stats(username)
-    return web.json_response(stats)
+    return json_response(stats)
 
 
 @routes.post("/api/push/time-settings")
@@ -792,11 +991,11 @@ async def push_update_time_settings(request):
     """Уақыт параметрлерін жаңарту"""
     encoded_creds = request.cookies.get("_pc")
     if not encoded_creds:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     creds = decode_credentials(encoded_creds)
     if not creds:
-        return web.json_response({"error": "invalid_creds"}, status=401)
+        return json_response({"error": "invalid_creds"}, status=401)
 
     username, _ = creds
     data = await request.json()
@@ -804,16 +1003,71 @@ async def push_update_time_settings(request):
 
     success = push_service.update_time_settings(username, time_settings)
     if success:
-        return web.json_response({"status": "ok", "time_settings": time_settings})
+        return json_response({"status": "ok", "time_settings": time_settings})
     else:
-        return web.json_response({"error": "not_subscribed"}, status=404)
+        return json_response({"error": "not_subscribed"}, status=404)
+
+
+# Жаппай тарату — тек BROADCAST_TOKEN орнатылған болса қолжетімді
+BROADCAST_TOKEN = os.environ.get("BROADCAST_TOKEN")
+
+
+def _broadcast_authorized(request) -> bool:
+    if not BROADCAST_TOKEN:
+        return False
+    auth = request.headers.get("Authorization", "")
+    return hmac.compare_digest(auth.encode(), f"Bearer {BROADCAST_TOKEN}".encode())
+
+
+@routes.post("/admin/broadcast")
+async def admin_broadcast(request):
+    """Барлық жазылушыларға хабарлама таратуды фонда бастау"""
+    if not _broadcast_authorized(request):
+        return json_response({"error": "unauthorized"}, status=401)
+
+    data = await request.json()
+    title = data.get("title")
+    body = data.get("body")
+    if not title or not body:
+        return json_response({"error": "title and body are required"}, status=400)
+
+    job = push_service.start_broadcast(
+        title, body, tag=data.get("tag"), data=data.get("data"), notification_type="broadcast"
+    )
+    return json_response(job.progress(), status=202)
+
+
+@routes.get("/admin/broadcast/{job_id}")
+async def admin_broadcast_status(request):
+    """Тарату барысы"""
+    if not _broadcast_authorized(request):
+        return json_response({"error": "unauthorized"}, status=401)
+
+    job = broadcast_engine.get(request.match_info["job_id"])
+    if job is None:
+        return json_response({"error": "not_found"}, status=404)
+    return json_response(job.progress())
+
+
+@routes.delete("/admin/broadcast/{job_id}")
+async def admin_broadcast_cancel(request):
+    """Жүріп жатқан таратуды тоқтату"""
+    if not _broadcast_authorized(request):
+        return json_response({"error": "unauthorized"}, status=401)
+
+    job_id = request.match_info["job_id"]
+    if broadcast_engine.get(job_id) is None:
+        return json_response({"error": "not_found"}, status=404)
+    # Аяқталған job өзгермейді — соңғы күйі қайтарылады
+    cancelled = broadcast_engine.cancel(job_id)
+    return json_response(broadcast_engine.get(job_id).progress(), status=202 if cancelled else 200)
 
 
 @routes.get("/api/umkd")
 async def get_umkd_folders(request):
     pt_token = request.get("pt_token")
     if not pt_token:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     try:
         from datetime import date
@@ -834,12 +1088,12 @@ async def get_umkd_folders(request):
             pc_cookie = request.cookies.get("_pc")
             if pc_cookie:
                 univer_code = request.cookies.get("univer_code", "kstu")
-                pt_token = await _platonus_refresh_token(pc_cookie, univer_code)
+                pt_token = await _platonus_refresh_token(pc_cookie, univer_code, pt_token)
                 if pt_token:
                     res = await platonus_get_umkd_list(pt_token, year, semester)
 
         if not res or not isinstance(res, dict):
-            return web.json_response([])
+            return json_response([])
 
         records = res.get("records") or []
         folders = []
@@ -862,17 +1116,17 @@ async def get_umkd_folders(request):
                 "type": f"{tutor} • {credits_val} кредит"
             })
             
-        return web.json_response(folders)
+        return json_response(folders)
     except Exception as e:
         print(f"Error fetching UMKD list: {e}")
-        return web.json_response([])
+        return json_response([])
 
 
 @routes.get("/api/umkd/{id}")
 async def get_umkd_files(request):
     pt_token = request.get("pt_token")
     if not pt_token:
-        return web.json_response({"error": "unauthorized"}, status=401)
+        return json_response({"error": "unauthorized"}, status=401)
 
     folder_id = request.match_info["id"]
 
@@ -894,12 +1148,12 @@ async def get_umkd_files(request):
             pc_cookie = request.cookies.get("_pc")
             if pc_cookie:
                 univer_code = request.cookies.get("univer_code", "kstu")
-                pt_token = await _platonus_refresh_token(pc_cookie, univer_code)
+                pt_token = await _platonus_refresh_token(pc_cookie, univer_code, pt_token)
                 if pt_token:
                     res = await platonus_get_umkd_list(pt_token, year, semester)
 
         if not res or not isinstance(res, dict):
-            return web.json_response([])
+            return json_response([])
 
         records = res.get("records") or []
         
@@ -915,11 +1169,11 @@ async def get_umkd_files(request):
                 break
                 
         if not matching_rec:
-            return web.json_response([])
+            return json_response([])
             
         crypt_file_id = matching_rec.get("cryptFileId")
         if not crypt_file_id:
-            return web.json_response([])
+            return json_response([])
             
         tutor = matching_rec.get("tutorName") or "Оқытушы"
         subj_name = matching_rec.get("subjectName") or "Оқу-әдістемелік материалдар"
@@ -939,10 +1193,10 @@ async def get_umkd_files(request):
             "url": f"/api/file/{crypt_file_id}?name={encoded_name}"
         }
         
-        return web.json_response([file_item])
+        return json_response([file_item])
     except Exception as e:
         print(f"Error fetching UMKD files: {e}")
-        return web.json_response([])
+        return json_response([])
 
 
 @routes.get("/api/file/{crypt_file_id}")
@@ -955,73 +1209,69 @@ async def download_file_proxy(request):
 
     crypt_file_id = request.match_info["crypt_file_id"]
     
-    from functions.platonus import _decode_pt, PLATONUS_HEADERS, PLATONUS_URL, PLATONUS_TIMEOUT
-    import aiohttp
-    
-    data = _decode_pt(pt_token)
-    headers = {**PLATONUS_HEADERS, "token": data.get("t", ""), "sid": data.get("s", "")}
-    cookies = data.get("c", {})
-    cookies["plt_sid"] = data.get("s", "")
+    from functions.platonus import _pt_url, _pt_headers_and_cookies
     
-    url = f"{PLATONUS_URL}/rest/api/file/{crypt_file_id}"
+    headers, cookies = _pt_headers_and_cookies(pt_token)
+    url = f"{_pt_url(pt_token)}/rest/api/file/{crypt_file_id}"
     
     try:
-        session = aiohttp.ClientSession(cookies=cookies, timeout=PLATONUS_TIMEOUT)
-        resp = await session.get(url, headers=headers)
-        
-        if resp.status != 200:
-            await session.close()
-            return web.Response(text="Failed to download file from Platonus", status=resp.status)
+        session = await platonus_client.session()
+        # Жауап қалай аяқталса да байланыс пулға қайтарылады; host орны
+        # platonus_request-пен ортақ — API сұраныстары pool-да кезек күтпейді
+        async with platonus_client.host_slot(urlparse(url).netloc), session.get(
+            url, headers=headers, cookies=cookies
+        ) as resp:
+            if resp.status != 200:
+                return web.Response(text="Failed to download file from Platonus", status=resp.status)
             
-        # Detect actual file type by reading first chunk (4KB)
-        first_chunk = await resp.content.read(4096)
+            # Detect actual file type by reading first chunk (4KB)
+            first_chunk = await resp.content.read(4096)
         
-        content_type = "application/octet-stream"
-        ext = ".bin"
+            content_type = "application/octet-stream"
+            ext = ".bin"
         
-        if first_chunk.startswith(b"%PDF"):
-            content_type = "application/pdf"
-            ext = ".pdf"
-        elif first_chunk.startswith(b"PK\x03\x04"):
-            content_type = "application/zip"
-            ext = ".zip"
+            if first_chunk.startswith(b"%PDF"):
+                content_type = "application/pdf"
+                ext = ".pdf"
+            elif first_chunk.startswith(b"PK\x03\x04"):
+                content_type = "application/zip"
+                ext = ".zip"
             
-        # Extract custom subject name for friendly filename
-        custom_name = request.query.get("name")
-        if custom_name:
-            import re
-            # Remove characters that are dangerous for file systems
-            safe_name = re.sub(r'[\\/*?:"<>|]', " ", custom_name)
-            safe_name = " ".join(safe_name.split())  # Clean extra spaces
-            filename = f"{safe_name}{ext}"
-        else:
-            filename = f"umkd_{crypt_file_id}{ext}"
+            # Extract custom subject name for friendly filename
+            custom_name = request.query.get("name")
+            if custom_name:
+                import re
+                # Remove characters that are dangerous for file systems
+                safe_name = re.sub(r'[\\/*?:"<>|]', " ", custom_name)
+                safe_name = " ".join(safe_name.split())  # Clean extra spaces
+                filename = f"{safe_name}{ext}"
+            else:
+                filename = f"umkd_{crypt_file_id}{ext}"
             
-        response = web.StreamResponse(
-            status=200,
-            reason="OK",
-            headers={
-                "Content-Type": content_type,
-                "Content-Disposition": f'attachment; filename="{filename}"'
-            }
-        )
+            response = web.StreamResponse(
+                status=200,
+                reason="OK",
+                headers={
+                    "Content-Type": content_type,
+                    "Content-Disposition": f'attachment; filename="{filename}"'
+                }
+            )
         
-        await response.prepare(request)
+            await response.prepare(request)
         
-        if first_chunk:
-            await response.write(first_chunk)
+            if first_chunk:
+                await response.write(first_chunk)
             
-        try:
-            while True:
-                chunk = await resp.content.read(65536)
-                if not chunk:
-                    break
-                await response.write(chunk)
-        finally:
-            await response.write_eof()
-            await session.close()
+            try:
+                while True:
+                    chunk = await resp.content.read(65536)
+                    if not chunk:
+                        break
+                    await response.write(chunk)
+            finally:
+                await response.write_eof()
             
-        return response
+            return response
     except Exception as e:
         print(f"Error proxying file download: {e}")
         return web.Response(text="Internal server error", status=500)
@@ -1305,7 +1555,7 @@ PRIVACY_POLICY = {
 
 @routes.get("/api/version")
 async def get_version(request):
-    return web.json_response("1.01")
+    return json_response("1.01", cache=True)
 
 
 @routes.get("/faq")
@@ -1313,7 +1563,7 @@ async def get_faq(request):
     lang = request.query.get("lang", "ru")
     if lang not in FAQ_DATA:
         lang = "ru"
-    return web.json_response(FAQ_DATA[lang])
+    return json_response(FAQ_DATA[lang], cache=True)
 
 
 @routes.get("/faq/{id}")
@@ -1338,12 +1588,12 @@ async def get_privacy(request):
     lang = request.query.get("lang", "ru")
     if lang not in PRIVACY_POLICY:
         lang = "ru"
-    return web.json_response({"text": PRIVACY_POLICY[lang]})
+    return json_response({"text": PRIVACY_POLICY[lang]})
 
 
 @routes.get("/auth/logout")
 async def logout(request):
-    response = web.json_response({"status": "ok"})
+    response = json_response({"status": "ok"})
     response.del_cookie("_pt")
     response.del_cookie("_pc")
     response.del_cookie("_pl")
@@ -1356,12 +1606,21 @@ async def logout(request):
 @routes.get("/health")
 async def health_check(request):
     """Health check endpoint for Railway"""
-    return web.json_response({"status": "ok", "service": "platonus"})
+    return json_response({
+        "status": "ok",
+        "service": "platonus",
+        "portals": {
+            "degraded": portal_health.degraded(),
+            "details": portal_health.snapshot(),
+        },
+        "push": push_sender.snapshot(),
+        "grade_checks": scheduled_notifications.grade_scheduler.snapshot(),
+    })
 
 
 @routes.get("/")
 async def index(request):
-    return web.FileResponse(os.path.join(CLIENT_DIR, "index.html"))
+    return frontend_response(request, "index.html")
 
 
 # Басқа frontend route-тарды index.html-ге бағыттау (SPA үшін)
@@ -1374,19 +1633,38 @@ async def frontend_handler(request):
     # Әйтпесе index.html береміз (client side routing)
 
     path = request.match_info.get("path", "")
+    return frontend_response(request, path)
 
-    # Файлдың нақты жолы
-    file_path = os.path.join(CLIENT_DIR, path)
 
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return web.FileResponse(file_path)
-
-    # Егер API емес болса және файл табылмаса -> index.html
-    return web.FileResponse(os.path.join(CLIENT_DIR, "index.html"))
+def frontend_response(request, path):
+    # Жол тек индекс кілттерімен салыстырылады — дискке қарамаймыз,
+    # "../" арқылы CLIENT_DIR-ден шығу мүмкін емес.
+    # Файл табылмаса -> index.html
+    item = static_index.lookup(path)
+    if item is None:
+        raise web.HTTPNotFound()
+    return static_index.response(request, item)
 
 
 async def on_startup(app):
     """Сервер қосылғанда орындалатын іс-шаралар"""
+    await platonus_client.start()
+    portal_health.start(probe_platonus_portal)
+
+    # Static индексін құру және бандлдарды бір рет сығу (event loop-ты бөгемеу үшін бөлек thread-те)
+    await asyncio.get_running_loop().run_in_executor(None, static_index.build)
+
+    # Базаны ашу және ескі JSON файлдарын көшіру — import кезінде емес, осында
+    push_service.init()
+    scheduled_notifications.init()
+    univer_directory.init()
+
+    # Бар push жазылуларынан username → университет каталогын толтыру
+    univer_directory.seed(
+        (user_id, sub.get("univer_code"))
+        for user_id, sub in push_service.subscriptions.items()
+    )
+
     try:
         await scheduled_notifications.start()
         print("Background tasks started")
@@ -1399,10 +1677,17 @@ async def on_cleanup(app):
     """Сервер тоқтағанда орындалатын іс-шаралар"""
     await scheduled_notifications.stop()
     print("Background tasks stopped")
+    await portal_health.stop()
+    await platonus_client.close()
+    await push_sender.client.close()
+    # Кезекте қалған өзгерістерді дискке жазу
+    await asyncio.get_running_loop().run_in_executor(None, persistence.stop)
 
 
 # App setup
-app = web.Application(middlewares=[cors_middleware, platonus_middleware])
+app = web.Application(
+    middlewares=[cors_middleware, compression_middleware, platonus_middleware]
+)
 app.on_startup.append(on_startup)
 app.on_cleanup.append(on_cleanup)
 app.add_routes(routes)
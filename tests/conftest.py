@@ -0,0 +1,5 @@
+import os
+import sys
+
+# server.py сияқты core папкасын path-қа қосамыз
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "core"))
@@ -0,0 +1,40 @@
+import asyncio
+
+from broadcast import CANCELLED, DEFERRED, DONE, FAILED, SENT, BroadcastEngine
+
+
+def test_job_counts_deferred_separately_from_failed():
+    async def send(user_id):
+        if user_id == "boom":
+            raise RuntimeError("push service down")
+        return {"a": SENT, "b": DEFERRED, "c": FAILED}[user_id]
+
+    async def run():
+        engine = BroadcastEngine(concurrency=2, per_host=1)
+        targets = [(user_id, f"https://push.example/{user_id}") for user_id in ("a", "b", "c", "boom")]
+        job = engine.start(targets, send)
+        # start() нәтижені күтпейді — job бірден қайтарылады
+        assert job.status != DONE
+        results = await job.wait()
+        return engine, job, results
+
+    engine, job, results = asyncio.run(run())
+    assert results == {"a": SENT, "b": DEFERRED, "c": FAILED, "boom": FAILED}
+    progress = engine.get(job.id).progress()
+    assert progress["status"] == DONE
+    assert (progress["sent"], progress["deferred"], progress["failed"]) == (1, 1, 2)
+    assert progress["done"] == progress["total"] == 4
+
+
+def test_cancel_stops_a_running_job():
+    async def run():
+        engine = BroadcastEngine()
+        job = engine.start([("a", "https://push.example/a")], lambda _: asyncio.sleep(60))
+        await asyncio.sleep(0)
+        assert engine.cancel(job.id)
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == CANCELLED
+    assert job.results == {}
@@ -0,0 +1,124 @@
+import asyncio
+import base64
+import time
+from datetime import datetime
+
+from academic_calendar import ATTESTATION, HOLIDAYS, PRACTICE, TERM, academic_period
+from grade_scheduler import (
+    MIN_INTERVAL,
+    NIGHT_FACTOR,
+    PERIOD_INTERVALS,
+    RECENT_CHANGE_FACTOR,
+    RECENT_CHANGE_WINDOW,
+    GradePollScheduler,
+)
+from push_notifications import ScheduledNotifications
+
+TERM_DAY = datetime(2025, 10, 1, 12, 0)
+ATTESTATION_DAY = datetime(2025, 10, 21, 12, 0)
+
+
+def test_period_intervals():
+    scheduler = GradePollScheduler()
+    assert scheduler.base_interval(TERM_DAY) == PERIOD_INTERVALS[TERM]
+    assert scheduler.base_interval(ATTESTATION_DAY) == PERIOD_INTERVALS[ATTESTATION]
+    assert scheduler.base_interval(datetime(2026, 4, 20, 12, 0)) == PERIOD_INTERVALS[PRACTICE]
+    assert scheduler.base_interval(datetime(2026, 8, 10, 12, 0)) == PERIOD_INTERVALS[HOLIDAYS]
+
+
+def test_night_interval_is_longer():
+    scheduler = GradePollScheduler()
+    night = TERM_DAY.replace(hour=3)
+    assert scheduler.base_interval(night) == PERIOD_INTERVALS[TERM] * NIGHT_FACTOR
+    assert scheduler.base_interval(TERM_DAY.replace(hour=7)) == PERIOD_INTERVALS[TERM]
+
+
+def test_recent_change_shortens_interval():
+    scheduler = GradePollScheduler()
+    scheduler._changed_at["recent"] = time.time() - 3600
+    scheduler._changed_at["old"] = time.time() - RECENT_CHANGE_WINDOW - 1
+    expected = PERIOD_INTERVALS[TERM] * RECENT_CHANGE_FACTOR
+    assert scheduler.interval("recent", TERM_DAY) == max(expected, MIN_INTERVAL)
+    assert scheduler.interval("old", TERM_DAY) == PERIOD_INTERVALS[TERM]
+    assert scheduler.interval("unknown", TERM_DAY) == PERIOD_INTERVALS[TERM]
+
+
+def test_interval_never_below_minimum():
+    scheduler = GradePollScheduler()
+    scheduler._changed_at["recent"] = time.time()
+    assert scheduler.interval("recent", ATTESTATION_DAY) >= MIN_INTERVAL
+
+
+def test_out_of_year_falls_back_to_term():
+    scheduler = GradePollScheduler()
+    for day in (datetime(2025, 8, 31, 12, 0), datetime(2027, 3, 1, 12, 0)):
+        assert academic_period(day.date()) == TERM
+        assert scheduler.base_interval(day) == PERIOD_INTERVALS[TERM]
+
+
+class FakePushService:
+    def __init__(self):
+        creds = base64.b64encode(b"student:secret").decode()
+        self.subscriptions = {"u1": {"univer_code": "kstu", "creds": creds, "settings": {}}}
+        self.listeners = []
+        self.sent = []
+
+    async def send_new_grade_notification(self, user_id, subject, grade, grade_type):
+        self.sent.append((user_id, subject, grade, grade_type))
+        return True
+
+
+def checker(journal):
+    """_check_user_grades сақтаулы күйі жадта, журналы алдын ала берілген"""
+    push = FakePushService()
+    notifications = ScheduledNotifications(push)
+    notifications.grade_states = {}
+
+    async def fetch_attestation(*args):
+        return journal[0]
+
+    notifications._fetch_attestation = fetch_attestation
+    return notifications, push
+
+
+def run_check(scheduler, notifications):
+    scheduler.sync([("u1", "kstu")])
+    asyncio.run(scheduler._check(time.monotonic(), "u1", notifications._check_user_grades))
+
+
+def attestation(ab1):
+    return [{"subject": "Math", "attestation": [["АБ1", ab1, False]]}]
+
+
+def test_baseline_and_legacy_checks_keep_interval():
+    scheduler = GradePollScheduler()
+    journal = [attestation(90)]
+    notifications, push = checker(journal)
+    before = scheduler.interval("u1")
+
+    # Бірінші тексеру — күй сақталады, бірақ бұл баға өзгерісі емес
+    run_check(scheduler, notifications)
+    assert "fp" in notifications.grade_states["u1"]
+
+    # Ескі last_state.json пішімі жаңа пішімге көшіріледі — бұл да өзгеріс емес
+    notifications.grade_states["u1"] = {"Math": {"ab1": 90, "ab2": 0.0, "exam": 0.0}}
+    run_check(scheduler, notifications)
+    assert "fp" in notifications.grade_states["u1"]
+
+    assert push.sent == []
+    assert scheduler.stats["changed"] == 0
+    assert "u1" not in scheduler._changed_at
+    assert scheduler.interval("u1") == before
+
+
+def test_new_grade_shortens_interval():
+    scheduler = GradePollScheduler()
+    journal = [attestation(90)]
+    notifications, push = checker(journal)
+    run_check(scheduler, notifications)
+
+    journal[0] = attestation(95)
+    run_check(scheduler, notifications)
+    assert push.sent == [("u1", "Math", "95", "АБ1")]
+    assert scheduler.stats["changed"] == 1
+    assert "u1" in scheduler._changed_at
@@ -0,0 +1,47 @@
+from grade_state import diff_grades
+
+
+def journal(**subjects):
+    """{пән: (ab1, ab2, exam)} → platonus_get_attestation пішіміндегі тізім"""
+    return [
+        {
+            "subject": subject,
+            "attestation": [["АБ1", ab1, False], ["АБ2", ab2, False], ["АА", exam, False]],
+        }
+        for subject, (ab1, ab2, exam) in subjects.items()
+    ]
+
+
+def test_first_check_is_a_silent_baseline():
+    state, changes = diff_grades(None, journal(Math=(90, 0, 0)))
+    assert changes == []
+    assert state["subjects"]["Math"]["ab1"] == 90
+
+
+def test_unchanged_journal_needs_no_write():
+    state, _ = diff_grades(None, journal(Math=(90, 0, 0)))
+    assert diff_grades(state, journal(Math=(90, 0, 0))) == (None, [])
+
+
+def test_all_fields_changing_together_are_reported():
+    state, _ = diff_grades(None, journal(Math=(0, 0, 0), Physics=(70, 0, 0)))
+    new_state, changes = diff_grades(state, journal(Math=(88, 91, 95), Physics=(70, 0, 0)))
+    assert changes == [("Math", "АБ1", 88), ("Math", "АБ2", 91), ("Math", "Емтихан", 95)]
+    # Өзгермеген пәннің жазбасы сол күйі қалады
+    assert new_state["subjects"]["Physics"] is state["subjects"]["Physics"]
+
+
+def test_legacy_state_without_hashes():
+    legacy = {"Math": {"ab1": 80, "ab2": 0, "exam": 0}, "Physics": {"ab1": 70, "ab2": 0, "exam": 0}}
+    new_state, changes = diff_grades(legacy, journal(Math=(80, 90, 0), Physics=(70, 0, 0)))
+    assert changes == [("Math", "АБ2", 90)]
+    assert "fp" in new_state
+    assert set(new_state["subjects"]) == {"Math", "Physics"}
+    assert all("fp" in entry for entry in new_state["subjects"].values())
+
+
+def test_empty_journal_keeps_existing_grades():
+    state, _ = diff_grades(None, journal(Math=(90, 0, 0)))
+    assert diff_grades(state, []) == (None, [])
+    legacy = {"Math": {"ab1": 90, "ab2": 0, "exam": 0}}
+    assert diff_grades(legacy, []) == (None, [])
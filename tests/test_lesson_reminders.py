@@ -0,0 +1,46 @@
+from datetime import date
+
+from lesson_reminders import LessonReminderIndex, lesson_start_minute
+
+MATH = {"subject": "Math", "time": "08:00-08:50"}
+PHYSICS = {"subject": "Physics", "time": "10:00"}
+
+
+def test_lesson_start_minute():
+    assert lesson_start_minute(MATH) == 8 * 60
+    assert lesson_start_minute({"time": "25:00"}) is None
+    assert lesson_start_minute({}) is None
+
+
+def test_reminders_are_bucketed_by_minute():
+    index = LessonReminderIndex()
+    index.reset(date(2025, 10, 1))
+    index.add_user("u1", [MATH, PHYSICS], 10)
+    index.add_user("u2", [MATH], 5)
+
+    assert index.pop(8 * 60 - 10) == [("u1", MATH, 10)]
+    assert index.pop(8 * 60 - 5) == [("u2", MATH, 5)]
+    assert index.pop(8 * 60) == []
+    assert len(index) == 1
+
+
+def test_reindex_moves_only_that_user():
+    index = LessonReminderIndex()
+    index.reset(date(2025, 10, 1))
+    index.add_user("u1", [MATH], 10)
+    index.add_user("u2", [MATH], 10)
+
+    index.reindex_user("u1", 30)
+    assert index.pop(8 * 60 - 10) == [("u2", MATH, 10)]
+    assert index.pop(8 * 60 - 30) == [("u1", MATH, 30)]
+
+
+def test_added_mid_day_skips_processed_minutes():
+    index = LessonReminderIndex()
+    index.reset(date(2025, 10, 1))
+    index.add_user("u1", [MATH, PHYSICS], 10, since=9 * 60)
+    assert len(index) == 1
+    assert index.pop(10 * 60 - 10) == [("u1", PHYSICS, 10)]
+
+    index.remove_user("u1")
+    assert "u1" not in index
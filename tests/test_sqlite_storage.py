@@ -0,0 +1,95 @@
+import pytest
+
+from utils.sqlite_storage import SqliteStorage, open_database
+from utils.write_behind import WRITE_BEHIND_MAX_ATTEMPTS, WriteBehind
+
+
+@pytest.fixture
+def writer():
+    # Ұзақ delay — тест өзі flush() шақырғанша өзгерістер кезекте тұрады
+    return WriteBehind(delay=60)
+
+
+@pytest.fixture
+def storage(tmp_path, writer):
+    db = open_database(str(tmp_path / "test.db"))
+    storage = SqliteStorage(
+        db, "subs", indexed={"flag": lambda value: value["flag"]}, cache=False, writer=writer
+    )
+    storage.update_many([("a", {"flag": 1}), ("b", {"flag": 1})])
+    yield storage
+    db.close()
+
+
+def test_find_sees_queued_upserts_and_deletes(storage, writer):
+    storage["c"] = {"flag": 1}
+    storage["a"] = {"flag": 0}
+    del storage["b"]
+
+    assert sorted(storage.find(flag=1)) == ["c"]
+    assert storage.find(flag=0) == ["a"]
+    assert "b" not in storage
+
+    assert writer.flush()
+    assert sorted(storage.find(flag=1)) == ["c"]
+    assert storage.find(flag=0) == ["a"]
+
+
+def test_find_rejects_unindexed_column(storage):
+    with pytest.raises(ValueError):
+        storage.find(missing=1)
+
+
+def test_failing_row_does_not_drop_the_batch(tmp_path, writer):
+    path = str(tmp_path / "batch.db")
+    db = open_database(path)
+    db.execute("CREATE TABLE t (key TEXT PRIMARY KEY, n INTEGER NOT NULL)")
+    insert = "INSERT INTO t VALUES (?, ?)"
+    writer.execute(path, "k1", insert, ("k1", 1))
+    # NOT NULL бұзылады — бұл жол тасталады
+    writer.execute(path, "k2", insert, ("k2", None))
+    # Кесте жоқ (OperationalError) — кезекке қайтарылады
+    writer.execute(path, "k3", "INSERT INTO missing VALUES (?)", ("k3",))
+    writer.execute(path, "k4", insert, ("k4", 4))
+
+    assert not writer.flush()
+    assert db.execute("SELECT key FROM t ORDER BY key").fetchall() == [("k1",), ("k4",)]
+
+    # k3 кезекте қалды — кесте пайда болса қайталау сәтті өтеді
+    db.execute("CREATE TABLE missing (key TEXT)")
+    assert writer.flush()
+    assert db.execute("SELECT key FROM missing").fetchall() == [("k3",)]
+    db.close()
+
+
+def test_persistent_operational_error_is_dropped(tmp_path, writer):
+    path = str(tmp_path / "missing.db")
+    writer.execute(path, "k1", "INSERT INTO missing VALUES (?)", ("k1",))
+
+    for _ in range(WRITE_BEHIND_MAX_ATTEMPTS - 1):
+        assert not writer.flush()
+    # Соңғы әрекеттен кейін жазу тасталады — кезек босайды
+    assert writer.flush()
+    assert writer.peek(path, "k1") is None
+
+
+def test_retried_writes_keep_their_order(tmp_path, writer):
+    path = str(tmp_path / "order.db")
+    db = open_database(path)
+    db.execute("CREATE TABLE h (u TEXT, slot INTEGER, PRIMARY KEY (u, slot))")
+    db.execute("INSERT INTO h VALUES ('u', 1)")
+    # Writer-дің байланысы құлыпты күтпейді — "database is locked" бірден шығады
+    writer._connections[path] = open_database(path)
+    writer._connections[path].execute("PRAGMA busy_timeout=0")
+
+    # Тарихты тазалау, содан кейін жаңа хабарлама
+    writer.execute(path, ("u", "*"), "DELETE FROM h WHERE u = ?", ("u",))
+    writer.execute(path, ("u", 0), "INSERT INTO h VALUES (?, ?)", ("u", 0))
+
+    db.execute("BEGIN IMMEDIATE")
+    assert not writer.flush()
+    db.execute("ROLLBACK")
+
+    assert writer.flush()
+    assert db.execute("SELECT u, slot FROM h").fetchall() == [("u", 0)]
+    db.close()